@@ -4,8 +4,70 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
 
+# Load .env only when there is one, and without walking the call stack the way
+# a bare load_dotenv() does; keeps cold starts cheap on replicas without it.
+_ENV_FILE = PROJECT_ROOT / ".env"
+if _ENV_FILE.exists():
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
 TICKETS_PATH = Path(os.getenv("TICKETS_PATH", DATA_DIR / "tickets.json"))
 MEMORY_PATH = Path(os.getenv("MEMORY_PATH", DATA_DIR / "memory.json"))
+QUEUE_PATH = Path(os.getenv("QUEUE_PATH", DATA_DIR / "queue.json"))
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", DATA_DIR / "archive"))
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", DATA_DIR / "exports"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", DATA_DIR / "profiles"))
+REPROCESS_DIR = Path(os.getenv("REPROCESS_DIR", DATA_DIR / "reprocess"))
 
 POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "120"))  # every 2 minutes
 CONFIDENCE_CLOSE_THRESHOLD = float(os.getenv("CONFIDENCE_CLOSE_THRESHOLD", "0.85"))
+# weights of the issue_type / severity / affected_system confidences in aggregate_confidence
+AGGREGATE_WEIGHTS = dict(zip(
+    ("issue_type", "severity", "affected_system"),
+    (float(w) for w in os.getenv("AGGREGATE_WEIGHTS", "0.5,0.25,0.25").split(",")),
+))
+POLL_INITIAL_DELAY_SECONDS = float(os.getenv("POLL_INITIAL_DELAY_SECONDS", "5"))  # first pass after readiness
+
+# Extraction queue: SLA (seconds from creation) per keyword severity, and workers per lane
+SLA_SECONDS = {
+    "critical": int(os.getenv("SLA_CRITICAL_SECONDS", "900")),      # 15 minutes
+    "high": int(os.getenv("SLA_HIGH_SECONDS", "3600")),             # 1 hour
+    "medium": int(os.getenv("SLA_MEDIUM_SECONDS", "28800")),        # 8 hours
+    "low": int(os.getenv("SLA_LOW_SECONDS", "86400")),              # 1 day
+}
+QUEUE_INTERACTIVE_WORKERS = int(os.getenv("QUEUE_INTERACTIVE_WORKERS", "2"))
+QUEUE_BULK_WORKERS = int(os.getenv("QUEUE_BULK_WORKERS", "1"))
+QUEUE_BULK_BATCH = int(os.getenv("QUEUE_BULK_BATCH", "20"))  # backlog tickets per tickets.json write
+QUEUE_INTERACTIVE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_INTERACTIVE_TIMEOUT_SECONDS", "30"))
+
+# Cold tier: terminal tickets untouched for this long leave tickets.json
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_CACHE_SEGMENTS = int(os.getenv("ARCHIVE_CACHE_SEGMENTS", "8"))  # parsed segments kept in memory
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))  # rows per Parquet row group
+
+# Request profiling: captures kept on disk, stack sampling rate, and the latency
+# above which a request is captured automatically (0, the default, disables slow
+# capture: without it no request carries a profile unless asked to)
+PROFILE_MAX_CAPTURES = int(os.getenv("PROFILE_MAX_CAPTURES", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))  # serialized GET responses
+
+# Admission control: threadpool for sync endpoints, threads kept free for cheap
+# reads, the LLM endpoint limit (adapts to latency between MIN and what the
+# pool leaves), its wait queue, and how long a queued request may wait
+ADMISSION_THREADPOOL_SIZE = int(os.getenv("ADMISSION_THREADPOOL_SIZE", "40"))
+ADMISSION_READ_RESERVED = int(os.getenv("ADMISSION_READ_RESERVED", "8"))
+ADMISSION_LLM_INITIAL_LIMIT = int(os.getenv("ADMISSION_LLM_INITIAL_LIMIT", "8"))
+ADMISSION_LLM_MIN_LIMIT = int(os.getenv("ADMISSION_LLM_MIN_LIMIT", "2"))
+ADMISSION_LLM_MAX_QUEUE = int(os.getenv("ADMISSION_LLM_MAX_QUEUE", "32"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+ADMISSION_EXPORT_LIMIT = int(os.getenv("ADMISSION_EXPORT_LIMIT", "2"))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2.0"))  # x best recent latency
+ADMISSION_BASELINE_DECAY_SECONDS = float(os.getenv("ADMISSION_BASELINE_DECAY_SECONDS", "120"))
+
+# Merge concurrent identical temperature-0 LLM calls into one upstream request
+LLM_COALESCE = os.getenv("LLM_COALESCE", "1") == "1"
@@ -0,0 +1,57 @@
+"""
+Export tickets and review/chat memory to columnar files for analytics.
+
+    python -m app.export                       # everything changed since the last run
+    python -m app.export --dataset tickets --full --format npz
+
+Files land in EXPORT_DIR as <dataset>-<watermark>.<format>; the watermark of
+each dataset is kept in EXPORT_DIR/watermarks.json so the next run only picks
+up tickets/entries updated after it. Rows stamped in the watermark's own
+millisecond are sent again only if they changed since (their digests are kept
+with the watermark), so a run with nothing new writes no file.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from .config import EXPORT_DIR
+from .services.export import DATASETS, FORMATS, default_format, export, load_watermarks, save_watermarks
+
+WATERMARKS_PATH = EXPORT_DIR / "watermarks.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", choices=sorted(DATASETS), action="append",
+                        help="dataset to export (repeatable, default: all)")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: parquet if pyarrow is installed")
+    parser.add_argument("--full", action="store_true", help="ignore the stored watermark")
+    args = parser.parse_args()
+
+    fmt = args.format or default_format()
+    watermarks = load_watermarks(WATERMARKS_PATH)
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+
+    for dataset in args.dataset or sorted(DATASETS):
+        previous = None if args.full else watermarks.get(dataset)
+        since = previous["watermark"] if previous else None
+        started = time.perf_counter()
+        tmp = EXPORT_DIR / f"{dataset}.partial"
+        with tmp.open("wb") as f:
+            result = export(dataset, fmt, f, since_ms=since, seen=previous["seen"] if previous else ())
+
+        if not result["rows"]:
+            tmp.unlink()
+            print(f"{dataset}: nothing new")
+            continue
+
+        stamp = datetime.fromtimestamp(result["watermark"] / 1000, tz=timezone.utc).strftime("%Y%m%dT%H%M%S")
+        out = EXPORT_DIR / f"{dataset}-{stamp}{'-full' if since is None else ''}.{fmt}"
+        tmp.replace(out)
+        watermarks[dataset] = {"watermark": result["watermark"], "seen": result["seen"]}
+        save_watermarks(WATERMARKS_PATH, watermarks)
+        print(f"{dataset}: {result['rows']} rows -> {out} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,90 @@
-from fastapi import FastAPI
-from .routes import chat, tickets
-from .services.ticket_engine import poller
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from .routes import chat, tickets, export, profiles
+from .services.ticket_engine import poller, load_json, ticket_queue
+from .services import readiness, profiling, admission
+from .services.archive import archiver, ticket_archive
+from .services.ticket_table import hot_table
+from .config import MEMORY_PATH, PROFILE_SLOW_MS
 import asyncio
+import time
 
 app = FastAPI(title="Automated Ticketing Solution API", version="0.1.0" )
 
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(tickets.router, prefix="/api", tags=["tickets"])
+app.include_router(export.router, prefix="/api", tags=["export"])
+app.include_router(profiles.router, prefix="/api", tags=["profiles"])
+
+readiness.register_warmup("tickets", hot_table)
+readiness.register_warmup("memory", lambda: load_json(MEMORY_PATH))
+readiness.register_warmup("queue", ticket_queue.load)
+readiness.register_warmup("archive-index", ticket_archive.load_index)
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    # opt in per request with `X-Profile: 1`, or for everything via /api/profiles/toggle
+    profile = profiling.begin(request.method, request.url.path, request.headers.get("x-profile") == "1")
+    if profile is None:
+        return await call_next(request)
+
+    watch = None
+    if profile.reason is None:
+        # slow-request capture: only start sampling stacks once the request is already slow
+        watch = asyncio.get_running_loop().call_later(PROFILE_SLOW_MS / 1000, profile.start_sampling)
+    try:
+        response = await call_next(request)
+    finally:
+        if watch is not None:
+            watch.cancel()
+        profiling.end(profile)
+
+    duration_ms = (time.perf_counter() - profile.started) * 1000
+    if profile.reason is not None or duration_ms >= PROFILE_SLOW_MS:
+        await asyncio.to_thread(profiling.save_capture, profile.to_dict(response.status_code, duration_ms))
+        response.headers["X-Profile-Id"] = profile.id
+    return response
+
+@app.middleware("http")
+async def admit_requests(request: Request, call_next):
+    # LLM-backed and export endpoints wait for a slot in their gate, or are shed
+    # with 429 (queue full) / 503 (waited too long); everything else goes straight through
+    gate = admission.gate_for(request.method, request.url.path)
+    if gate is None:
+        return await call_next(request)
+    try:
+        await gate.acquire()
+    except admission.Rejected as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": {"message": f"Server busy: {e.reason}, retry later"}},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    # the adaptive limit is fed by llm.create_completion, not by request time
+    try:
+        return await call_next(request)
+    finally:
+        gate.release()
 
 @app.on_event("startup")
 async def startup_event():
-    # kick off background poller
+    admission.configure_threadpool()
+    # warm stores in the background so /health answers immediately
+    asyncio.create_task(readiness.warm_up())
+    # kick off background poller (waits for readiness itself)
     asyncio.create_task(poller())
+    # move old closed/approved/rejected tickets out of tickets.json
+    asyncio.create_task(archiver())
 
 @app.get("/health")
-def health():
+async def health():
+    # async so it never waits for a threadpool slot, even when the LLM endpoints are saturated
     return {"status":"ok"}
+
+@app.get("/ready")
+def ready(response: Response):
+    state = readiness.status()
+    if not state["ready"]:
+        response.status_code = 503
+    return state
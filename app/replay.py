@@ -0,0 +1,235 @@
+"""
+Offline replay of auto-close decisions.
+
+Loads the confidence scores of every ticket and the reviewer outcome recorded
+for it (APPROVED / EDITED / REJECTED), then sweeps aggregate weights and
+close thresholds and reports, for each configuration, how many tickets would
+be auto-closed and how often a reviewer overrode such a ticket.
+
+    python -m app.replay --step 0.05 --thresholds 0.70:0.95:0.01 --max-override 0.1
+
+The sweep never re-runs extraction. `aggregate_confidence` is rounded to two
+decimals, so each ticket falls into one of 101 buckets. Tickets with identical
+scores are collapsed first; then every weight vector is a few vector
+operations plus a bincount, and every threshold is a cumulative sum over the
+buckets. Aggregates are computed in the same order and with the same rounding
+as calculate_aggregate, so bucket counts match the live decision exactly.
+"""
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .config import TICKETS_PATH, MEMORY_PATH, AGGREGATE_WEIGHTS, CONFIDENCE_CLOSE_THRESHOLD
+from .services.ticket_engine import load_json
+from .services.archive import ticket_archive
+
+FIELDS = ("issue_type", "severity", "affected_system")
+BUCKETS = 101  # aggregate_confidence is rounded to 0.00 .. 1.00
+
+STATUS_OUTCOMES = {"APPROVED": "APPROVE", "EDITED": "EDIT", "REJECTED": "REJECT"}
+OVERRIDES = ("EDIT", "REJECT")
+
+# -----------------------------
+# Loading
+# -----------------------------
+def review_outcomes(tickets: List[Dict], memory: List[Dict]) -> Dict[str, str]:
+    """Latest reviewer action per ticket: ticket status/metadata first, then memory.json."""
+    outcomes = {}
+    for entry in memory:
+        if entry.get("ticketId") and entry.get("action") in STATUS_OUTCOMES.values():
+            outcomes[entry["ticketId"]] = entry["action"]
+    for t in tickets:
+        action = (t.get("metadata") or {}).get("lastReviewAction") or STATUS_OUTCOMES.get(t.get("status"))
+        if action in STATUS_OUTCOMES.values():
+            outcomes[t.get("ticket_no")] = action
+    return outcomes
+
+def load_history(tickets_path: Path = TICKETS_PATH, memory_path: Path = MEMORY_PATH) -> Dict[str, np.ndarray]:
+    """
+    Returns arrays over all tickets with slot confidences:
+        scores     float64 (N, 3)  issue_type / severity / affected_system confidence
+        reviewed   bool    (N,)    a reviewer acted on the ticket
+        overridden bool    (N,)    ... and the action was EDIT or REJECT
+    """
+    # hot tier plus everything that has been archived
+    tickets = load_json(tickets_path) + list(ticket_archive.iter_tickets())
+    outcomes = review_outcomes(tickets, load_json(memory_path))
+
+    rows, reviewed, overridden = [], [], []
+    for t in tickets:
+        conf = (t.get("slots") or {}).get("confidence_scores")
+        if not conf:
+            continue
+        rows.append([float(conf.get(f) or 0) for f in FIELDS])
+        action = outcomes.get(t.get("ticket_no"))
+        reviewed.append(action is not None)
+        overridden.append(action in OVERRIDES)
+
+    return {
+        "scores": np.asarray(rows, dtype=np.float64).reshape(-1, len(FIELDS)),
+        "reviewed": np.asarray(reviewed, dtype=bool),
+        "overridden": np.asarray(overridden, dtype=bool),
+    }
+
+# -----------------------------
+# Sweep
+# -----------------------------
+def weight_grid(step: float) -> np.ndarray:
+    """All weight vectors on the simplex (w1 + w2 + w3 = 1) with the given step."""
+    n = int(round(1 / step))
+    grid = [(i, j, n - i - j) for i in range(n + 1) for j in range(n + 1 - i)]
+    return np.asarray(grid, dtype=np.float64) / n
+
+def threshold_range(spec: str) -> np.ndarray:
+    start, stop, step = (float(x) for x in spec.split(":"))
+    return np.round(np.arange(start, stop + step / 2, step), 2)
+
+# round(x, 2) rounds the exact binary value of x. Between buckets k and k + 1
+# the decision point is the decimal (2k + 1) / 200, and the double nearest to
+# it, _MIDPOINTS[k], separates the two sides exactly: doubles below it round
+# down, doubles above it round up, and the midpoint double itself rounds
+# whichever way round() takes it.
+_MIDPOINTS = (2 * np.arange(BUCKETS) + 1) / 200
+_AT_MIDPOINT = np.array([round(round(m, 2) * 100) for m in _MIDPOINTS.tolist()])
+
+def aggregate_buckets(scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    (N, K) aggregate bucket (aggregate_confidence * 100) per score row and
+    weight vector, exactly as calculate_aggregate computes it: the three
+    products summed left to right, then round(x, 2).
+    """
+    agg = scores[:, 0:1] * weights[:, 0] + scores[:, 1:2] * weights[:, 1] + scores[:, 2:3] * weights[:, 2]
+    # x * 100 may be off by one ulp; comparing against the midpoint fixes that up
+    k = np.clip(np.floor(agg * 100).astype(np.int64), 0, BUCKETS - 1)
+    mid = _MIDPOINTS[k]
+    buckets = np.where(agg > mid, k + 1, np.where(agg < mid, k, _AT_MIDPOINT[k]))
+    return np.clip(buckets, 0, BUCKETS - 1)
+
+def bucket_counts(history: Dict[str, np.ndarray], weights: np.ndarray,
+                  chunk_elements: int = 1 << 22) -> Dict[str, np.ndarray]:
+    """
+    Count tickets per (weight vector, aggregate bucket) for all, reviewed and
+    overridden tickets. Returns arrays of shape (len(weights), BUCKETS).
+    Weight vectors are taken in chunks of about `chunk_elements` aggregates
+    (unique score rows x weights), which bounds the temporaries.
+    """
+    scores = history["scores"]
+    # collapse identical score rows; the counts become bincount weights
+    unique, inverse = np.unique(scores, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    per_row = {
+        "total": np.bincount(inverse, minlength=len(unique)),
+        "reviewed": np.bincount(inverse, weights=history["reviewed"], minlength=len(unique)),
+        "overridden": np.bincount(inverse, weights=history["overridden"], minlength=len(unique)),
+    }
+
+    counts = {k: np.zeros((len(weights), BUCKETS), dtype=np.int64) for k in per_row}
+    chunk = max(1, chunk_elements // max(len(unique), 1))
+    for lo in range(0, len(weights), chunk):
+        w = weights[lo:lo + chunk]
+        buckets = aggregate_buckets(unique, w)
+        flat = (buckets + np.arange(len(w)) * BUCKETS).ravel()
+        for k, row_counts in per_row.items():
+            c = np.bincount(flat, weights=np.repeat(row_counts, len(w)), minlength=len(w) * BUCKETS)
+            counts[k][lo:lo + chunk] = np.rint(c).astype(np.int64).reshape(len(w), BUCKETS)
+    return counts
+
+def sweep(history: Dict[str, np.ndarray], weights: np.ndarray, thresholds: Iterable[float]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every (weight vector, threshold) pair. Returned arrays have shape
+    (len(weights), len(thresholds)).
+    """
+    thresholds = np.asarray(list(thresholds), dtype=np.float64)
+    counts = bucket_counts(history, weights)
+    # tickets with aggregate >= t  ==  suffix sum from bucket ceil(t * 100)
+    first_bucket = np.clip(np.ceil(thresholds * 100 - 1e-9).astype(np.int64), 0, BUCKETS)
+    at_or_above = {}
+    for k, c in counts.items():
+        suffix = np.concatenate([np.cumsum(c[:, ::-1], axis=1)[:, ::-1], np.zeros((len(c), 1), np.int64)], axis=1)
+        at_or_above[k] = suffix[:, first_bucket]
+
+    total = max(len(history["scores"]), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        override_rate = at_or_above["overridden"] / at_or_above["reviewed"]
+    return {
+        "auto_closed": at_or_above["total"],
+        "auto_close_rate": at_or_above["total"] / total,
+        "reviewed_closed": at_or_above["reviewed"],
+        "overridden": at_or_above["overridden"],
+        "override_rate": override_rate,
+    }
+
+# -----------------------------
+# CLI
+# -----------------------------
+def _fmt_rate(x: float) -> str:
+    return "    -" if math.isnan(x) else f"{x:6.1%}"
+
+def report(weights: np.ndarray, thresholds: np.ndarray, result: Dict[str, np.ndarray],
+           max_override: Optional[float], top: int):
+    current = np.array([AGGREGATE_WEIGHTS[f] for f in FIELDS])
+    rate, override = result["auto_close_rate"], result["override_rate"]
+
+    # rank by auto-close rate among configs within the override budget; ties
+    # go to the lower override rate, then to the stricter threshold
+    ok = np.ones_like(rate, dtype=bool) if max_override is None else ~(override > max_override)
+    strictness = np.broadcast_to(thresholds, rate.shape)
+    ranked = np.lexsort((
+        strictness.ravel(),
+        -np.nan_to_num(override, nan=0.0).ravel(),
+        np.where(ok, rate, -1.0).ravel(),
+    ))[::-1][:top]
+
+    print(f"{'issue':>6} {'sev':>6} {'system':>6} {'thresh':>6} {'closed':>8} {'rate':>7} {'override':>8}")
+    for flat in ranked:
+        i, j = np.unravel_index(flat, rate.shape)
+        if not ok[i, j]:
+            break
+        w = weights[i]
+        marker = "  <- current" if np.allclose(w, current) and math.isclose(thresholds[j], CONFIDENCE_CLOSE_THRESHOLD) else ""
+        print(f"{w[0]:6.2f} {w[1]:6.2f} {w[2]:6.2f} {thresholds[j]:6.2f} {result['auto_closed'][i, j]:8d} "
+              f"{_fmt_rate(rate[i, j]):>7} {_fmt_rate(override[i, j]):>8}{marker}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=Path, default=TICKETS_PATH)
+    parser.add_argument("--memory", type=Path, default=MEMORY_PATH)
+    parser.add_argument("--step", type=float, default=0.05, help="weight grid step on the simplex")
+    parser.add_argument("--thresholds", default="0.50:1.00:0.01", help="start:stop:step")
+    parser.add_argument("--max-override", type=float, default=None, help="hide configs above this override rate")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = load_history(args.tickets, args.memory)
+    loaded = time.perf_counter()
+
+    weights = weight_grid(args.step)
+    current = np.array([[AGGREGATE_WEIGHTS[f] for f in FIELDS]])
+    if not np.isclose(weights, current).all(axis=1).any():
+        weights = np.vstack([weights, current])
+    thresholds = threshold_range(args.thresholds)
+    if not np.isclose(thresholds, CONFIDENCE_CLOSE_THRESHOLD).any():
+        thresholds = np.sort(np.append(thresholds, CONFIDENCE_CLOSE_THRESHOLD))
+
+    result = sweep(history, weights, thresholds)
+    done = time.perf_counter()
+
+    n = len(history["scores"])
+    print(f"{n} tickets ({int(history['reviewed'].sum())} reviewed, {int(history['overridden'].sum())} overridden); "
+          f"{len(weights) * len(thresholds)} configurations")
+    print(f"load {loaded - started:.2f}s, sweep {done - loaded:.3f}s\n")
+    report(weights, thresholds, result, args.max_override, args.top)
+
+    i = int(np.flatnonzero(np.isclose(weights, current).all(axis=1))[0])
+    j = int(np.flatnonzero(np.isclose(thresholds, CONFIDENCE_CLOSE_THRESHOLD))[0])
+    print(f"\ncurrent config: auto-close {_fmt_rate(result['auto_close_rate'][i, j]).strip()}, "
+          f"override {_fmt_rate(result['override_rate'][i, j]).strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Re-extract slots for the whole ticket history (hot tier and archive).
+
+    python -m app.reprocess --mode fallback --workers 8       # keyword rules, process pool
+    python -m app.reprocess --mode llm --workers 16           # Azure OpenAI, async workers
+    python -m app.reprocess --resume <run_id>                 # continue an interrupted run
+
+Live tickets are never modified. Each run gets its own directory under
+REPROCESS_DIR. It holds the shard plan (manifest.json) and one result file
+per finished shard, which doubles as the checkpoint. At the end it writes a
+versioned slot set (slots.json) and a diff against the current slots
+(diff.json).
+
+`--mode llm` never falls back to the keyword rules: a ticket whose call fails
+is recorded under failed/ and its shard is not checkpointed, so `--resume`
+retries it. slots.json and diff.json are only written once every shard is done.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .config import REPROCESS_DIR, TICKETS_PATH, CONFIDENCE_CLOSE_THRESHOLD
+from .services.archive import ticket_archive
+from .services.slot_extractor import fallback_extract, llm_configured, llm_extract
+from .services.ticket_engine import load_json
+
+SLOT_FIELDS = ("issue_type", "severity", "affected_system")
+# LLM shards take minutes, not milliseconds; keep a retried shard cheap
+DEFAULT_SHARD_SIZE = {"fallback": 1000, "llm": 50}
+
+
+def _write_json(path: Path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+def all_tickets() -> Dict[str, Dict]:
+    tickets = {t["ticket_no"]: t for t in ticket_archive.iter_tickets() if t.get("ticket_no")}
+    # the hot copy wins if a ticket is in both tiers
+    tickets.update({t["ticket_no"]: t for t in load_json(TICKETS_PATH) if t.get("ticket_no")})
+    return tickets
+
+# -----------------------------
+# Run planning / checkpoints
+# -----------------------------
+def plan_run(mode: str, shard_size: int) -> Path:
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    run_dir = REPROCESS_DIR / run_id
+    (run_dir / "shards").mkdir(parents=True)
+    ticket_nos = sorted(all_tickets())
+    _write_json(run_dir / "manifest.json", {
+        "run_id": run_id,
+        "mode": mode,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "total": len(ticket_nos),
+        "shards": [ticket_nos[i:i + shard_size] for i in range(0, len(ticket_nos), shard_size)],
+    })
+    return run_dir
+
+def pending_shards(run_dir: Path, manifest: Dict) -> List[int]:
+    return [i for i in range(len(manifest["shards"])) if not (run_dir / "shards" / f"{i:05d}.json").exists()]
+
+def _save_shard(run_dir: Path, index: int, results: Dict[str, Dict], elapsed: float):
+    _write_json(run_dir / "shards" / f"{index:05d}.json", {"elapsed": elapsed, "results": results})
+    (run_dir / "failed" / f"{index:05d}.json").unlink(missing_ok=True)
+
+def _save_failures(run_dir: Path, index: int, errors: Dict[str, str]):
+    # not a checkpoint: the shard stays pending and is retried on --resume
+    (run_dir / "failed").mkdir(exist_ok=True)
+    _write_json(run_dir / "failed" / f"{index:05d}.json", {"errors": errors})
+
+# -----------------------------
+# Workers
+# -----------------------------
+def _fallback_shard(descriptions: Dict[str, str]):
+    # runs in a child process
+    started = time.perf_counter()
+    results = {no: fallback_extract(desc) for no, desc in descriptions.items()}
+    return results, time.perf_counter() - started
+
+def run_fallback(run_dir: Path, manifest: Dict, shards: List[int], tickets: Dict[str, Dict], workers: int, report):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fallback_shard, {no: tickets[no].get("description") or "" for no in manifest["shards"][i] if no in tickets}): i
+            for i in shards
+        }
+        for future in as_completed(futures):
+            results, elapsed = future.result()
+            _save_shard(run_dir, futures[future], results, elapsed)
+            report(len(results))
+
+async def run_llm(run_dir: Path, manifest: Dict, shards: List[int], tickets: Dict[str, Dict], workers: int, report) -> int:
+    """Returns the number of tickets that failed; their shards stay pending."""
+    # one shard at a time per worker; llm_extract is blocking, so each call
+    # runs in a thread and `workers` calls are in flight at once
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in shards:
+        queue.put_nowait(i)
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        while not queue.empty():
+            i = queue.get_nowait()
+            started = time.perf_counter()
+            results, errors = {}, {}
+            for no in manifest["shards"][i]:
+                if no not in tickets:
+                    continue
+                try:
+                    results[no] = await asyncio.to_thread(llm_extract, tickets[no].get("description") or "")
+                except Exception as e:
+                    errors[no] = f"{type(e).__name__}: {e}"
+            if errors:
+                _save_failures(run_dir, i, errors)
+                failed += len(errors)
+            else:
+                _save_shard(run_dir, i, results, time.perf_counter() - started)
+            report(len(results))
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return failed
+
+# -----------------------------
+# Diff
+# -----------------------------
+def _value(slots: Dict, field: str):
+    value = (slots or {}).get(field)
+    if isinstance(value, dict):
+        value = value.get("value")
+    return value.lower() if isinstance(value, str) else value
+
+def build_diff(run_dir: Path, tickets: Dict[str, Dict]) -> Dict:
+    """Merge shard results into slots.json and write what changed to diff.json."""
+    new_slots, diff = {}, {}
+    for path in sorted((run_dir / "shards").glob("*.json")):
+        new_slots.update(json.loads(path.read_text(encoding="utf-8"))["results"])
+
+    for no, new in new_slots.items():
+        old = (tickets.get(no) or {}).get("slots") or {}
+        changed = [f for f in SLOT_FIELDS if _value(old, f) != _value(new, f)]
+        old_close = (old.get("aggregate_confidence") or 0) >= CONFIDENCE_CLOSE_THRESHOLD
+        new_close = new["aggregate_confidence"] >= CONFIDENCE_CLOSE_THRESHOLD
+        if changed or old_close != new_close:
+            diff[no] = {
+                "changed": changed,
+                "auto_close": {"old": old_close, "new": new_close},
+                "old": {f: old.get(f) for f in SLOT_FIELDS + ("aggregate_confidence",)},
+                "new": {f: new.get(f) for f in SLOT_FIELDS + ("aggregate_confidence",)},
+            }
+
+    _write_json(run_dir / "slots.json", new_slots)
+    _write_json(run_dir / "diff.json", diff)
+    return {"tickets": len(new_slots), "changed": len(diff),
+            "auto_close_flips": sum(d["auto_close"]["old"] != d["auto_close"]["new"] for d in diff.values())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("fallback", "llm"), default="fallback")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help=f"tickets per checkpoint (default {DEFAULT_SHARD_SIZE['fallback']} for fallback, "
+                             f"{DEFAULT_SHARD_SIZE['llm']} for llm)")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue a previous run")
+    args = parser.parse_args()
+
+    if args.resume:
+        run_dir = REPROCESS_DIR / args.resume
+        if not (run_dir / "manifest.json").exists():
+            raise SystemExit(f"no reprocess run '{args.resume}' in {REPROCESS_DIR}")
+        mode = json.loads((run_dir / "manifest.json").read_text(encoding="utf-8"))["mode"]
+    else:
+        run_dir, mode = None, args.mode
+    if mode == "llm" and not llm_configured():
+        raise SystemExit("--mode llm needs AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY and AZURE_OPENAI_DEPLOYMENT")
+    if run_dir is None:
+        run_dir = plan_run(mode, args.shard_size or DEFAULT_SHARD_SIZE[mode])
+
+    manifest = json.loads((run_dir / "manifest.json").read_text(encoding="utf-8"))
+    tickets = all_tickets()
+    shards = pending_shards(run_dir, manifest)
+    print(f"run {manifest['run_id']} ({manifest['mode']}): {manifest['total']} tickets, "
+          f"{len(manifest['shards']) - len(shards)}/{len(manifest['shards'])} shards already done")
+
+    started = time.perf_counter()
+    done = 0
+
+    def report(n: int):
+        nonlocal done
+        done += n
+        elapsed = time.perf_counter() - started
+        print(f"  {done} tickets in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f}/s)", flush=True)
+
+    failed = 0
+    if manifest["mode"] == "fallback":
+        run_fallback(run_dir, manifest, shards, tickets, args.workers, report)
+    else:
+        failed = asyncio.run(run_llm(run_dir, manifest, shards, tickets, args.workers, report))
+
+    elapsed = time.perf_counter() - started
+    print(f"processed {done} tickets in {elapsed:.2f}s ({done / elapsed if elapsed else 0:.0f} tickets/s)")
+    remaining = pending_shards(run_dir, manifest)
+    if remaining:
+        # a partial slots.json would read as "these tickets didn't change"
+        raise SystemExit(f"{failed} tickets failed, {len(remaining)} shards pending (errors in {run_dir / 'failed'}); "
+                         f"retry with --resume {manifest['run_id']}")
+    summary = build_diff(run_dir, tickets)
+    print(f"{summary['changed']} of {summary['tickets']} tickets changed, "
+          f"{summary['auto_close_flips']} would flip auto-close -> {run_dir / 'diff.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,32 @@
 from fastapi import APIRouter, HTTPException
 from ..models.schemas import ChatRequest, ChatResponse
-from ..services.ticket_engine import load_json, save_json
-from ..services.slot_extractor import extract_with_openai
+from ..services.ticket_engine import load_json, save_json, update_tickets, process_interactive
 from pathlib import Path
 from datetime import datetime
 import json
-import os
-from openai import AzureOpenAI
 from typing import Dict, List, Optional
 from ..services.comment_validator import is_valid_comment
-from ..config import TICKETS_PATH,MEMORY_PATH,CONFIDENCE_CLOSE_THRESHOLD
+from ..services.llm import complete, complete_json
+from ..services import profiling
+from ..services.archive import all_ticket_numbers, find_ticket, update_ticket
+from ..config import TICKETS_PATH,MEMORY_PATH
 
 router = APIRouter()
-# ------------------------------
-# Azure OpenAI client
-# ------------------------------
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-02-15-preview",
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
+
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ticket_no": {"type": "string"},
+        "action": {"type": "string", "enum": ["APPROVE", "REJECT", "EDIT"]},
+        "comment": {"type": "string"},
+    },
+    "required": ["ticket_no", "action", "comment"],
+}
 
 # ------------------------------
 # Azure LLM Intent Detection
 # ------------------------------
+@profiling.timed("llm_intent")
 def llm_intent(message: str) -> str:
     prompt = f"""
     You are a ticket management assistant.
@@ -35,12 +38,7 @@ def llm_intent(message: str) -> str:
     Only respond with one word: create, view, or update.
     User message: "{message}"
     """
-    resp = client.chat.completions.create(
-        model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return resp.choices[0].message.content.strip().lower()
+    return complete([{"role": "user", "content": prompt}], temperature=0).lower()
 
 # ------------------------------
 # Chat endpoint
@@ -63,43 +61,45 @@ def chat(req: ChatRequest):
             if not desc:
                 response_message = "Please provide a description for the ticket."
             else:
+                # archived tickets keep their numbers, so count both tiers
                 existing_nums = [
-                    int(t["ticket_no"].split("-")[1])
-                    for t in tickets
-                    if t.get("ticket_no", "").startswith("TICKET-")
+                    int(no.split("-")[1])
+                    for no in all_ticket_numbers(tickets)
+                    if no.startswith("TICKET-")
                 ]
                 next_num = max(existing_nums) + 1 if existing_nums else 1
                 new_id = f"TICKET-{next_num:04d}"
 
-                # ✅ Extract slots immediately
-                slots = extract_with_openai(desc)
-
-                # ✅ Decide status based on confidence
-                if slots["aggregate_confidence"] < CONFIDENCE_CLOSE_THRESHOLD:
-                    status = "needs-review"
-                else:
-                    status = "closed"
-
                 new_ticket = {
                     "ticket_no": new_id,
                     "description": desc,
-                    "status": status,
+                    "status": "open",
                     "metadata": {
                         "createdAt": datetime.utcnow().isoformat() + "Z",
                         "createdBy": "chat-user"
-                    },
-                    "slots": slots
+                    }
                 }
-
-                tickets.append(new_ticket)
-                save_json(TICKETS_PATH, tickets)
-
-                response_message = (
-                    f"✅ Ticket {new_id} created!\n"
-                    f"Description: {desc}\n"
-                    f"Status: {status}\n"
-                    f"(slots extracted at creation, confidence={slots['aggregate_confidence']:.2f})"
-                )
+                update_tickets(TICKETS_PATH, lambda data: data.append(new_ticket) or True)
+
+                # ✅ Extract slots on the interactive lane (ahead of the backlog)
+                processed = process_interactive(new_ticket)
+
+                if processed is None:
+                    response_message = (
+                        f"✅ Ticket {new_id} created!\n"
+                        f"Description: {desc}\n"
+                        f"Status: open\n"
+                        f"(slot extraction is queued and will finish shortly)"
+                    )
+                else:
+                    # ✅ Status decided from confidence by the engine
+                    slots = processed["slots"]
+                    response_message = (
+                        f"✅ Ticket {new_id} created!\n"
+                        f"Description: {desc}\n"
+                        f"Status: {processed['status']}\n"
+                        f"(slots extracted at creation, confidence={slots['aggregate_confidence']:.2f})"
+                    )
         else:
             response_message = "Please use the format: 'New ticket: description'"
 
@@ -115,12 +115,8 @@ def chat(req: ChatRequest):
         Answer the following user question exactly and concisely:
         User message: "{req.message}"
         """
-        resp = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-            messages=[{"role": "system", "content": system_prompt}],
-            temperature=0
-        )
-        response_message = resp.choices[0].message.content.strip()
+        with profiling.stage("llm_view"):
+            response_message = complete([{"role": "system", "content": system_prompt}], temperature=0)
 
     # ------------------- REVIEW TICKET -------------------
     elif intent in ("review", "update"):
@@ -134,27 +130,15 @@ def chat(req: ChatRequest):
         }}
         Message: "{req.message}"
         """
-        resp = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-            messages=[{"role": "user", "content": system_prompt}],
-            temperature=0
-        )
-        content = resp.choices[0].message.content.strip()
-
-        # Cleanup possible ```json wrappers
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        if content.startswith("```"):
-            content = content[3:].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-
         try:
-            review_data = json.loads(content)
+            with profiling.stage("llm_review_parse"):
+                review_data = complete_json(
+                    [{"role": "user", "content": system_prompt}], "review_ticket", REVIEW_SCHEMA, temperature=0
+                )
             ticket_no = review_data.get("ticket_no")
-            action = review_data.get("action", "").upper()
+            action = str(review_data.get("action", "")).upper()
             comments = review_data.get("comment", "")
-        except Exception as e:
+        except ValueError as e:
             print(e)
             return {
                 "message": """Please use the format:
@@ -166,9 +150,8 @@ def chat(req: ChatRequest):
                 "valid": False
             }
 
-        # Validate ticket exists
-        ticket = next((t for t in tickets if t.get("ticket_no") == ticket_no), None)
-        if not ticket:
+        # Validate ticket exists (hot tier or archive)
+        if not ticket_no or find_ticket(ticket_no, tickets) is None:
             return {"message": f"Ticket {ticket_no} not found.", "valid": False}
 
         # Validate action
@@ -192,27 +175,25 @@ def chat(req: ChatRequest):
         memory.append(entry)
         save_json(MEMORY_PATH, memory)
 
-        # ✅ Update ticket in place
-        ticket["status"] = {
-            "APPROVE": "APPROVED",
-            "REJECT": "REJECTED",
-            "EDIT": "EDITED"
-        }[action]
+        # ✅ Update the current copy of the ticket (restored from the archive if needed);
+        # `tickets` was loaded before the LLM calls and may be stale by now
+        def _review(ticket):
+            ticket["status"] = {
+                "APPROVE": "APPROVED",
+                "REJECT": "REJECTED",
+                "EDIT": "EDITED"
+            }[action]
 
-        ticket.setdefault("metadata", {})["lastReviewAction"] = action
-        ticket["metadata"]["updatedAt"] = datetime.utcnow().isoformat() + 'Z'
+            ticket.setdefault("metadata", {})["lastReviewAction"] = action
+            ticket["metadata"]["updatedAt"] = datetime.utcnow().isoformat() + 'Z'
 
-        # ✅ Store resolution inside ticket
-        ticket["review_summary"] = comments.split('.')[0].strip()
-        ticket["resolution_steps"] = comments.strip()
+            # ✅ Store resolution inside ticket
+            ticket["review_summary"] = comments.split('.')[0].strip()
+            ticket["resolution_steps"] = comments.strip()
 
-        # Replace the ticket in tickets list instead of appending
-        for i, t in enumerate(tickets):
-            if t.get("ticket_no") == ticket_no:
-                tickets[i] = ticket
-                break
-
-        save_json(TICKETS_PATH, tickets)
+        ticket = update_ticket(ticket_no, _review)
+        if ticket is None:
+            return {"message": f"Ticket {ticket_no} not found.", "valid": False}
 
         response_message = (
             f"✅ Ticket {ticket_no} reviewed successfully.\n"
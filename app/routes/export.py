@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+import tempfile
+from ..services.export import DATASETS, FORMATS, default_format, export
+from ..services.work_queue import parse_timestamp
+
+router = APIRouter()
+
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "npz": "application/octet-stream"}
+CHUNK_SIZE = 1 << 20
+
+def _stream(f):
+    try:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+@router.get("/export")
+def export_dataset(dataset: str = "tickets", format: str = None, since: str = None):
+    """
+    Stream a dataset as Parquet (or npz). `since` is an ISO timestamp or the
+    X-Export-Watermark of a previous export; only rows changed after it are sent.
+    """
+    fmt = format or default_format()
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=422, detail={"message": f"dataset must be one of {sorted(DATASETS)}"})
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=422, detail={"message": f"format must be one of {list(FORMATS)}"})
+    if fmt == "parquet" and default_format() != "parquet":
+        raise HTTPException(status_code=400, detail={"message": "parquet export needs pyarrow; use format=npz"})
+
+    since_ms = None
+    if since:
+        if since.isdigit():
+            since_ms = int(since)
+        else:
+            ts = parse_timestamp(since)
+            if ts is None:
+                raise HTTPException(status_code=422, detail={"message": "since must be an ISO timestamp or a watermark"})
+            since_ms = int(ts * 1000)
+
+    # spill to disk past 16 MB; the file is streamed back in 1 MB chunks
+    f = tempfile.SpooledTemporaryFile(max_size=16 << 20)
+    result = export(dataset, fmt, f, since_ms=since_ms)
+    f.seek(0)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return StreamingResponse(
+        _stream(f),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{dataset}-{stamp}.{fmt}"',
+            "X-Export-Rows": str(result["rows"]),
+            "X-Export-Watermark": str(result["watermark"]),
+        },
+    )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from ..services import profiling
+
+router = APIRouter()
+
+@router.get("/profiles")
+def list_profiles():
+    """Captured request profiles, newest first (stacks omitted)."""
+    return {"enabled": profiling.state["enabled"], "captures": profiling.list_captures()}
+
+@router.post("/profiles/toggle")
+def toggle_profiling(enabled: bool):
+    """Admin switch: profile every request while enabled."""
+    profiling.state["enabled"] = enabled
+    return {"enabled": enabled}
+
+@router.get("/profiles/{capture_id}")
+def get_profile(capture_id: str, format: str = "json"):
+    """A capture as JSON (stage breakdown + folded stacks) or as folded stacks only."""
+    capture = profiling.load_capture(capture_id) if capture_id.isalnum() else None
+    if capture is None:
+        raise HTTPException(status_code=404, detail={"message": "profile not found"})
+    if format == "folded":
+        return PlainTextResponse(
+            capture["folded"],
+            headers={"Content-Disposition": f'attachment; filename="{capture_id}.folded"'},
+        )
+    return capture
@@ -1,33 +1,71 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import TypeAdapter
 from typing import List
 import json, datetime
 from ..models.schemas import Ticket, ReviewActionRequest,TicketSlots,SlotConfidence
-from ..services.ticket_engine import load_json, save_json
+from ..services.ticket_engine import ticket_queue, store_version
 from ..services.comment_validator import is_valid_comment
+from ..services.archive import ticket_archive, find_ticket, ticket_exists, update_ticket
+from ..services.response_cache import conditional_json
+from ..services.ticket_table import hot_table
+from ..services import admission
 from ..config import TICKETS_PATH, MEMORY_PATH
 
 router = APIRouter()
 
+_ticket_adapter = TypeAdapter(Ticket)
+_tickets_adapter = TypeAdapter(List[Ticket])
+
+def _version():
+    return store_version(TICKETS_PATH, ticket_archive.index_path)
+
 @router.get("/tickets", response_model=List[Ticket], response_model_by_alias=True)
-def list_tickets(status: str = None, severity: str = None):
-    tickets = load_json(TICKETS_PATH)
- 
-    if status:
-        tickets = [t for t in tickets if t.get("status") == status]
-    if severity:
-        tickets = [
-    t for t in tickets
-    if (t.get("slots") or {}).get("severity", "").lower() == severity.lower()
-]
-    return tickets
+def list_tickets(request: Request, status: str = None, severity: str = None, include_archived: bool = False):
+    # pollers send If-None-Match; unchanged stores answer 304 or from the cache
+    def build():
+        # filter on the coded columns; only matching rows become dicts again
+        table = hot_table()
+        tickets = table.rows(table.filter(status, severity))
+
+        if include_archived:
+            # opt-in: only segments that can match the filters are opened, but
+            # an unfiltered request still opens the whole cold tier
+            hot = {t.get("ticket_no") for t in tickets}
+            tickets += [t for t in ticket_archive.search(status, severity) if t.get("ticket_no") not in hot]
+        return _tickets_adapter.dump_json(_tickets_adapter.validate_python(tickets), by_alias=True)
+
+    return conditional_json(request, _version(), build)
+
+@router.get("/tickets/{ticket_no}", response_model=Ticket, response_model_by_alias=True)
+def get_ticket(request: Request, ticket_no: str):
+    def build():
+        ticket = find_ticket(ticket_no)
+        if ticket is None:
+            raise HTTPException(status_code=404, detail={"message": "ticket not found"})
+        return _ticket_adapter.dump_json(_ticket_adapter.validate_python(ticket), by_alias=True)
+
+    return conditional_json(request, _version(), build)
+
+@router.get("/queue")
+def queue_stats():
+    """Depth and wait times of the extraction queue, per lane."""
+    return ticket_queue.stats()
+
+@router.get("/archive")
+def archive_stats():
+    """Size of the cold tier."""
+    return ticket_archive.stats()
+
+@router.get("/admission")
+async def admission_stats():
+    """Limits, in-flight and queued requests, and sheds per admission gate."""
+    # async: gate state belongs to the event loop
+    return admission.stats()
 
 @router.post("/review", response_model=Ticket, response_model_by_alias=True)
 def review_action(req: ReviewActionRequest):
-    tickets = load_json(TICKETS_PATH)
-    
-    # --- Find the ticket ---
-    found = next((t for t in tickets if t.get("ticket_no") == req.ticket_no), None)
-    if not found:
+    # --- Check the ticket exists (hot tier or archive) ---
+    if not ticket_exists(req.ticket_no):
         raise HTTPException(status_code=404, detail={"message": "ticket not found"})
     
     # --- Validate action and comments ---
@@ -57,13 +95,20 @@ def review_action(req: ReviewActionRequest):
     MEMORY_PATH.write_text(json.dumps(memory, indent=2), encoding='utf-8')
     
     # --- Update ticket ---
-    found.setdefault("metadata", {})["lastReviewAction"] = req.action
-    found["status"] = {
-        "APPROVE": "APPROVED",
-        "EDIT": "EDITED",
-        "REJECT": "REJECTED",
-    }[req.action]
-    save_json(TICKETS_PATH, tickets)
+    # applied to the current copy under the store lock: the validation above
+    # takes seconds, and lane workers may have written slots in the meantime
+    def _review(ticket):
+        ticket.setdefault("metadata", {})["lastReviewAction"] = req.action
+        ticket["metadata"]["updatedAt"] = datetime.datetime.utcnow().isoformat() + 'Z'
+        ticket["status"] = {
+            "APPROVE": "APPROVED",
+            "EDIT": "EDITED",
+            "REJECT": "REJECTED",
+        }[req.action]
+
+    found = update_ticket(req.ticket_no, _review)
+    if found is None:
+        raise HTTPException(status_code=404, detail={"message": "ticket not found"})
     
     # --- Convert slots to TicketSlots format ---
     if found.get("slots"):
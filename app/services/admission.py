@@ -0,0 +1,176 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from ..config import (
+    ADMISSION_THREADPOOL_SIZE, ADMISSION_READ_RESERVED, ADMISSION_LLM_INITIAL_LIMIT, ADMISSION_LLM_MIN_LIMIT,
+    ADMISSION_LLM_MAX_QUEUE, ADMISSION_MAX_WAIT_SECONDS, ADMISSION_EXPORT_LIMIT, ADMISSION_LATENCY_TOLERANCE,
+    ADMISSION_BASELINE_DECAY_SECONDS,
+)
+
+# requests not listed here (ticket reads, health checks, stats) are never queued
+ROUTE_CLASSES = {
+    ("POST", "/api/chat"): "llm",
+    ("POST", "/api/review"): "llm",
+    ("GET", "/api/export"): "export",
+}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one class of endpoints.
+
+    Lives on the event loop (no locks). If `adaptive`, the limit follows the
+    upstream latency reported through observe(): it shrinks when latency goes
+    well above the best recent latency (the upstream LLM is saturating) and
+    grows by one while the gate is full and latency is healthy. Whole-request
+    time is no signal: validation errors answer in milliseconds and queue
+    waits say nothing about the upstream.
+    """
+
+    WARMUP_SAMPLES = 5
+
+    def __init__(self, name: str, limit: int, min_limit: int, max_limit: int,
+                 max_queue: int, max_wait: float, adaptive: bool = False):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self.latency_ewma: Optional[float] = None
+        self.latency_baseline: Optional[float] = None
+        self._samples: deque = deque(maxlen=256)
+        self._seen = 0
+        self._last_sample: Optional[float] = None
+        self.rejected = {429: 0, 503: 0}
+        self.admitted = 0
+
+    def _retry_after(self) -> int:
+        per_request = self.latency_ewma or 1.0
+        return max(1, min(60, math.ceil(per_request * (len(self._waiters) + 1) / max(int(self.limit), 1))))
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected[429] += 1
+            raise Rejected(429, self._retry_after(), f"{self.name} queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # client went away while queued: leave the queue, or pass on the
+            # slot release() already handed us
+            if waiter.done():
+                self.in_flight -= 1
+                self._wake()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            self.rejected[503] += 1
+            raise Rejected(503, self._retry_after(), f"timed out waiting for a {self.name} slot")
+        self.admitted += 1  # release() handed us its slot
+
+    def observe(self, latency: float):
+        """Report one upstream call's latency; safe to call from any thread."""
+        if self.adaptive:
+            self._samples.append((time.monotonic(), latency))
+
+    def release(self):
+        self.in_flight -= 1
+        while self._samples:
+            self._adapt(*self._samples.popleft())
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to the oldest waiters."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adapt(self, at: float, latency: float):
+        self._seen += 1
+        if self._seen <= self.WARMUP_SAMPLES:
+            # plain mean of the first samples, so one odd call can't seed the baseline
+            self.latency_ewma = latency if self.latency_ewma is None else \
+                self.latency_ewma + (latency - self.latency_ewma) / self._seen
+            self.latency_baseline = self.latency_ewma
+            self._last_sample = at
+            return
+
+        self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+        # best recent smoothed latency (a single fast call only dents it), decaying
+        # towards the current latency so an old low point doesn't pin it forever
+        decay = 1 - math.exp(-max(0.0, at - self._last_sample) / ADMISSION_BASELINE_DECAY_SECONDS)
+        self._last_sample = at
+        drifted = self.latency_baseline + (self.latency_ewma - self.latency_baseline) * decay
+        self.latency_baseline = min(self.latency_ewma, drifted)
+
+        if self.latency_ewma > self.latency_baseline * ADMISSION_LATENCY_TOLERANCE:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        elif self._waiters or self.in_flight + 1 >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + 1)
+
+    def stats(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "latency_ewma_seconds": None if self.latency_ewma is None else round(self.latency_ewma, 3),
+            "latency_baseline_seconds": None if self.latency_baseline is None else round(self.latency_baseline, 3),
+        }
+
+
+# LLM-backed endpoints never get the whole threadpool: ADMISSION_READ_RESERVED
+# threads stay free for ticket reads and health checks.
+_llm_max = max(ADMISSION_LLM_MIN_LIMIT, ADMISSION_THREADPOOL_SIZE - ADMISSION_READ_RESERVED - ADMISSION_EXPORT_LIMIT)
+
+gates = {
+    "llm": AdmissionGate("llm", min(ADMISSION_LLM_INITIAL_LIMIT, _llm_max), ADMISSION_LLM_MIN_LIMIT, _llm_max,
+                         ADMISSION_LLM_MAX_QUEUE, ADMISSION_MAX_WAIT_SECONDS, adaptive=True),
+    "export": AdmissionGate("export", ADMISSION_EXPORT_LIMIT, ADMISSION_EXPORT_LIMIT, ADMISSION_EXPORT_LIMIT,
+                            ADMISSION_EXPORT_LIMIT, ADMISSION_MAX_WAIT_SECONDS),
+}
+
+def gate_for(method: str, path: str) -> Optional[AdmissionGate]:
+    name = ROUTE_CLASSES.get((method, path))
+    return gates[name] if name else None
+
+def configure_threadpool():
+    """Size the threadpool sync endpoints run in (must run on the event loop)."""
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ADMISSION_THREADPOOL_SIZE
+
+def observe_llm_latency(latency: float):
+    """Called by llm.create_completion after every upstream call."""
+    gates["llm"].observe(latency)
+
+def stats() -> Dict:
+    return {name: gate.stats() for name, gate in gates.items()}
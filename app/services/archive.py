@@ -0,0 +1,263 @@
+import asyncio
+import copy
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..config import ARCHIVE_DIR, ARCHIVE_AFTER_DAYS, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_CACHE_SEGMENTS, TICKETS_PATH
+from . import readiness
+from .ticket_engine import load_json, update_tickets, bump_store_version, ticket_numbers
+from .ticket_table import current_hot_table
+from .work_queue import parse_timestamp
+
+TERMINAL_STATUSES = ("closed", "APPROVED", "REJECTED")
+
+# -----------------------------
+# Segment files
+# -----------------------------
+# A segment is a gzipped JSON list of tickets. It is written once and never
+# modified, so parsed segments can be cached for as long as we like.
+@lru_cache(maxsize=ARCHIVE_CACHE_SEGMENTS)
+def _read_segment(path: Path) -> List[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+def _ticket_age_reference(t: Dict) -> Optional[float]:
+    meta = t.get("metadata") or {}
+    return parse_timestamp(meta.get("updatedAt")) or parse_timestamp(meta.get("createdAt"))
+
+def _unstamped(t: Optional[Dict]) -> Optional[Dict]:
+    """Ticket without its archivedAt stamp, for comparing hot and archived copies."""
+    if t is None or "archivedAt" not in (t.get("metadata") or {}):
+        return t
+    meta = {k: v for k, v in t["metadata"].items() if k != "archivedAt"}
+    return dict(t, metadata=meta)
+
+def _severity(t: Dict) -> str:
+    severity = (t.get("slots") or {}).get("severity") or ""
+    return severity.lower() if isinstance(severity, str) else ""
+
+# -----------------------------
+# Cold tier
+# -----------------------------
+class TicketArchive:
+    """
+    Cold tier for tickets in a terminal state.
+
+    Old terminal tickets are moved out of tickets.json into immutable segments
+    under ARCHIVE_DIR. index.json maps each archived ticket_no to its segment
+    plus the status/severity used by list filters, so searches only open the
+    segments that can match. Segments are read lazily and cached.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.index_path = directory / "index.json"
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict]] = None
+
+    # ---- index ----
+    def load_index(self) -> Dict[str, Dict]:
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                if self.index_path.exists():
+                    self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            return self._index
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.index_path, json.dumps(self._index).encode("utf-8"))
+        bump_store_version(self.index_path)
+
+    def ticket_numbers(self) -> List[str]:
+        return list(self.load_index())
+
+    def __contains__(self, ticket_no: str) -> bool:
+        return ticket_no in self.load_index()
+
+    # ---- hot -> cold ----
+    def archive(self, tickets_path: Path = TICKETS_PATH, older_than_days: float = ARCHIVE_AFTER_DAYS,
+                now: Optional[float] = None) -> int:
+        """Move terminal tickets not touched for `older_than_days` into a new segment."""
+        cutoff = (now or time.time()) - older_than_days * 86400
+        index = self.load_index()
+
+        def _split(data):
+            cold = [
+                t for t in data
+                if t.get("status") in TERMINAL_STATUSES
+                and t.get("ticket_no")
+                and (_ticket_age_reference(t) or 0) < cutoff
+            ]
+            # a hot copy identical to the archived one (left by a crash between
+            # the two writes) just leaves the hot tier; no new segment for it
+            stale = {t["ticket_no"] for t in cold
+                     if t["ticket_no"] in index and _unstamped(self.get(t["ticket_no"])) == _unstamped(t)}
+            cold = [t for t in cold if t["ticket_no"] not in stale]
+            if stale:
+                data[:] = [t for t in data if t.get("ticket_no") not in stale]
+            if not cold:
+                return len(stale)
+
+            # stamped so incremental exports pick up the move to the cold tier
+            archived_at = datetime.utcnow().isoformat() + "Z"
+            for t in cold:
+                t.setdefault("metadata", {})["archivedAt"] = archived_at
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            segment = self.directory / f"segment-{int(time.time() * 1000)}.json.gz"
+            payload = json.dumps(cold, ensure_ascii=False).encode("utf-8")
+            # the segment and index are on disk before the tickets leave the
+            # hot file; after a crash a ticket may be in both tiers, never in neither
+            _write_atomic(segment, gzip.compress(payload))
+            with self._lock:
+                for t in cold:
+                    index[t["ticket_no"]] = {
+                        "segment": segment.name,
+                        "status": t.get("status"),
+                        "severity": _severity(t),
+                    }
+                self._save_index()
+
+            moved = {t["ticket_no"] for t in cold}
+            data[:] = [t for t in data if t.get("ticket_no") not in moved]
+            return len(cold) + len(stale)
+
+        moved = update_tickets(tickets_path, _split) or 0
+        if moved:
+            logging.info(f"[archive] moved {moved} tickets to the cold tier")
+        return moved
+
+    # ---- lookups ----
+    def _segment_tickets(self, segment: str) -> List[Dict]:
+        return _read_segment(self.directory / segment)
+
+    def get(self, ticket_no: str) -> Optional[Dict]:
+        entry = self.load_index().get(ticket_no)
+        if entry is None:
+            return None
+        return next((t for t in self._segment_tickets(entry["segment"]) if t.get("ticket_no") == ticket_no), None)
+
+    def search(self, status: Optional[str] = None, severity: Optional[str] = None) -> List[Dict]:
+        """Archived tickets matching the same filters as GET /api/tickets."""
+        if status and status not in TERMINAL_STATUSES:
+            return []
+        index = self.load_index()
+        wanted = {
+            no: entry for no, entry in index.items()
+            if (not status or entry["status"] == status)
+            and (not severity or entry["severity"] == severity.lower())
+        }
+        results = []
+        for segment in sorted({e["segment"] for e in wanted.values()}):
+            results.extend(t for t in self._segment_tickets(segment)
+                           if wanted.get(t.get("ticket_no"), {}).get("segment") == segment)
+        return results
+
+    def iter_tickets(self) -> Iterator[Dict]:
+        index = self.load_index()
+        for segment in sorted({e["segment"] for e in index.values()}):
+            for t in self._segment_tickets(segment):
+                if index.get(t.get("ticket_no"), {}).get("segment") == segment:
+                    yield t
+
+    # ---- cold -> hot ----
+    def forget(self, ticket_no: str):
+        """Drop a ticket from the index once its hot copy is on disk (the segment is left untouched)."""
+        index = self.load_index()
+        with self._lock:
+            if index.pop(ticket_no, None) is not None:
+                self._save_index()
+
+    def restore(self, ticket_no: str, tickets_path: Path = TICKETS_PATH) -> Optional[Dict]:
+        """Bring an archived ticket back into the hot tier (e.g. to review it again)."""
+        if ticket_no not in self:
+            return None
+        return update_ticket(ticket_no, lambda t: None, tickets_path)
+
+    def stats(self) -> Dict:
+        index = self.load_index()
+        return {
+            "archived": len(index),
+            "segments": len({e["segment"] for e in index.values()}),
+            "cached_segments": _read_segment.cache_info().currsize,
+        }
+
+
+ticket_archive = TicketArchive(ARCHIVE_DIR)
+
+# -----------------------------
+# Both tiers
+# -----------------------------
+def find_ticket(ticket_no: str, tickets: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """
+    Look a ticket up in the hot tier first, then in the archive. One-off
+    lookups never rebuild the hot table: while it is stale after a write, a
+    hot ticket is read straight from tickets.json.
+    """
+    if tickets is None:
+        found = None
+        table = current_hot_table()
+        if table is not None:
+            i = table.find(ticket_no)
+            found = table.row(i) if i is not None else None
+        elif ticket_no in ticket_numbers(TICKETS_PATH):
+            found = next((t for t in load_json(TICKETS_PATH) if t.get("ticket_no") == ticket_no), None)
+    else:
+        found = next((t for t in tickets if t.get("ticket_no") == ticket_no), None)
+    return found if found is not None else ticket_archive.get(ticket_no)
+
+def ticket_exists(ticket_no: str) -> bool:
+    """Cheap check against the ticket_no sets of both tiers; no ticket is read."""
+    return ticket_no in ticket_numbers(TICKETS_PATH) or ticket_no in ticket_archive
+
+def update_ticket(ticket_no: str, mutate: Callable[[Dict], object], tickets_path: Path = TICKETS_PATH) -> Optional[Dict]:
+    """
+    Apply `mutate` to the current copy of one ticket and save it, all under the
+    store lock, so slow work done before (LLM validation) can't overwrite
+    concurrent writes with a stale list. An archived ticket is brought back
+    into the hot tier first. Returns the updated ticket, or None if unknown.
+    """
+    def _apply(data):
+        ticket = next((t for t in data if t.get("ticket_no") == ticket_no), None)
+        if ticket is None:
+            archived = ticket_archive.get(ticket_no)
+            if archived is None:
+                return None
+            ticket = copy.deepcopy(archived)
+            meta = ticket.setdefault("metadata", {})
+            meta.pop("archivedAt", None)
+            meta["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+            data.append(ticket)
+        mutate(ticket)
+        return ticket
+
+    ticket = update_tickets(tickets_path, _apply)
+    if ticket is not None and ticket_no in ticket_archive:
+        # after the hot copy is saved: a crash in between leaves it in both tiers, never in neither
+        ticket_archive.forget(ticket_no)
+    return ticket
+
+def all_ticket_numbers(tickets: List[Dict]) -> List[str]:
+    return [t.get("ticket_no", "") for t in tickets] + ticket_archive.ticket_numbers()
+
+async def archiver():
+    await readiness.wait_ready()
+    while True:
+        try:
+            await asyncio.to_thread(ticket_archive.archive)
+        except Exception as e:
+            print("[archiver] error:", e)
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
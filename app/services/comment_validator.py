@@ -1,16 +1,20 @@
-import os
-from openai import AzureOpenAI
-import json
 import re
-
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-02-15-preview",
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
+from .llm import complete_json
+from . import profiling
 
 # PLACEHOLDERS = ["TODO", "TBD", "XXX", "...", "placeholder"]
 
+VALIDATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "valid": {"type": "boolean"},
+        "message": {"type": "string"},
+        "corrected_comment": {"type": ["string", "null"]},
+    },
+    "required": ["valid", "message"],
+}
+
+@profiling.timed("is_valid_comment")
 def is_valid_comment(comment: str) -> dict:
     """
     Validate a ticket review comment using LLM. 
@@ -63,28 +67,18 @@ def is_valid_comment(comment: str) -> dict:
 ]
 
     try:
-        resp = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-            messages=messages,
-            temperature=0
-        )
-
-        llm_output = resp.choices[0].message.content.strip()
-
-        # Extract JSON safely
-        match = re.search(r"\{.*\}", llm_output, re.DOTALL)
-        if match:
-            print("match")
-            return json.loads(match.group())
-        else:
-            return {
-                "valid": False,
-                "message": "LLM response could not be parsed, please rewrite the comment.",
-                "corrected_comment": None
-            }
+        result = complete_json(messages, "report_validation", VALIDATION_SCHEMA, temperature=0)
+    except ValueError:
+        return {
+            "valid": False,
+            "message": "LLM response could not be parsed, please rewrite the comment.",
+            "corrected_comment": None
+        }
     except Exception as e:
         return {
             "valid": False,
             "message": f"Error validating comment: {str(e)}",
             "corrected_comment": None
         }
+    result.setdefault("corrected_comment", None)
+    return result
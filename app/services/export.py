@@ -0,0 +1,303 @@
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import BinaryIO, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import TICKETS_PATH, MEMORY_PATH, EXPORT_BATCH_ROWS
+from .archive import ticket_archive
+from .ticket_engine import load_json
+from .work_queue import parse_timestamp
+
+# -----------------------------
+# Column layout
+# -----------------------------
+# kind: str (free text), cat (low-cardinality, dictionary-encoded),
+#       f32 (float, NaN when missing), ts (UTC timestamp, ms), bool
+TICKET_COLUMNS = [
+    ("ticket_no", "str"),
+    ("description", "str"),
+    ("status", "cat"),
+    ("issue_type", "cat"),
+    ("severity", "cat"),
+    ("affected_system", "cat"),
+    ("conf_issue_type", "f32"),
+    ("conf_severity", "f32"),
+    ("conf_affected_system", "f32"),
+    ("aggregate_confidence", "f32"),
+    ("proposed_fix", "str"),
+    ("review_summary", "str"),
+    ("created_by", "cat"),
+    ("last_review_action", "cat"),
+    ("created_at", "ts"),
+    ("updated_at", "ts"),
+    ("archived", "bool"),
+    ("archived_at", "ts"),
+]
+
+MEMORY_COLUMNS = [
+    ("ticket_id", "str"),
+    ("action", "cat"),
+    ("user", "cat"),
+    ("summary", "str"),
+    ("resolution_steps", "str"),
+    ("user_message", "str"),
+    ("bot_response", "str"),
+    ("timestamp", "ts"),
+]
+
+DATASETS = {"tickets": TICKET_COLUMNS, "memory": MEMORY_COLUMNS}
+FORMATS = ("parquet", "npz")
+
+def _ms(value: Optional[str]) -> Optional[int]:
+    ts = parse_timestamp(value)
+    return None if ts is None else int(ts * 1000)
+
+def _slot(slots: Dict, name: str) -> Optional[str]:
+    value = slots.get(name)
+    if isinstance(value, dict):  # {"value": ..., "confidence": ...}
+        value = value.get("value")
+    return value if isinstance(value, str) else None
+
+def _float(value) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def ticket_row(t: Dict, archived: bool = False) -> Dict:
+    slots = t.get("slots") or {}
+    conf = slots.get("confidence_scores") or {}
+    meta = t.get("metadata") or {}
+    return {
+        "ticket_no": t.get("ticket_no"),
+        "description": t.get("description"),
+        "status": t.get("status"),
+        "issue_type": _slot(slots, "issue_type"),
+        "severity": _slot(slots, "severity"),
+        "affected_system": _slot(slots, "affected_system"),
+        "conf_issue_type": _float(conf.get("issue_type")),
+        "conf_severity": _float(conf.get("severity")),
+        "conf_affected_system": _float(conf.get("affected_system")),
+        "aggregate_confidence": _float(slots.get("aggregate_confidence", t.get("aggregate_confidence"))),
+        "proposed_fix": t.get("proposedFix"),
+        "review_summary": t.get("review_summary"),
+        "created_by": meta.get("createdBy"),
+        "last_review_action": meta.get("lastReviewAction"),
+        "created_at": _ms(meta.get("createdAt")),
+        "updated_at": _ms(meta.get("updatedAt")),
+        "archived": archived,
+        "archived_at": _ms(meta.get("archivedAt")) if archived else None,
+    }
+
+def memory_row(entry: Dict) -> Dict:
+    return {
+        "ticket_id": entry.get("ticketId"),
+        "action": entry.get("action"),
+        "user": entry.get("user"),
+        "summary": entry.get("summary"),
+        "resolution_steps": entry.get("resolution_steps"),
+        "user_message": entry.get("user_message"),
+        "bot_response": entry.get("bot_response"),
+        "timestamp": _ms(entry.get("timestamp")),
+    }
+
+# -----------------------------
+# Sources
+# -----------------------------
+def iter_rows(dataset: str, since_ms: Optional[int] = None, seen: Collection[str] = (),
+              tickets_path: Path = TICKETS_PATH, memory_path: Path = MEMORY_PATH) -> Iterator[Dict]:
+    """
+    Flattened rows of a dataset. With `since_ms`, only rows changed at or after
+    that watermark (tickets: updatedAt/createdAt/archivedAt, memory: timestamp)
+    are returned. Stamps are cut to milliseconds, so rows from the watermark's
+    own millisecond are sent again rather than risk missing one, except those
+    whose row_digest is in `seen` (already exported at that watermark).
+    """
+    if dataset == "tickets":
+        source = itertools.chain(
+            (ticket_row(t) for t in load_json(tickets_path)),
+            (ticket_row(t, archived=True) for t in ticket_archive.iter_tickets()),
+        )
+    elif dataset == "memory":
+        source = (memory_row(e) for e in load_json(memory_path))
+    else:
+        raise ValueError(f"unknown dataset '{dataset}', expected one of {sorted(DATASETS)}")
+
+    seen = set(seen)
+    for row in source:
+        if since_ms is None:
+            yield row
+            continue
+        mark = watermark_of(dataset, row)
+        if mark > since_ms or (mark == since_ms and row_digest(row) not in seen):
+            yield row
+
+def watermark_of(dataset: str, row: Dict) -> int:
+    if dataset == "tickets":
+        return max(row["updated_at"] or 0, row["created_at"] or 0, row["archived_at"] or 0)
+    return row["timestamp"] or 0
+
+def row_digest(row: Dict) -> str:
+    """Content hash of an exported row; a row changed again within the same millisecond gets a new one."""
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# -----------------------------
+# Writers
+# -----------------------------
+def default_format() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "npz"
+
+def _arrow_batch(columns, rows: List[Dict]):
+    import pyarrow as pa
+
+    arrays, fields = [], []
+    for name, kind in columns:
+        values = [r[name] for r in rows]
+        if kind == "cat":
+            arr = pa.array(values, pa.string()).dictionary_encode()
+        elif kind == "f32":
+            arr = pa.array(values, pa.float32())
+        elif kind == "ts":
+            arr = pa.array(values, pa.timestamp("ms", tz="UTC"))
+        elif kind == "bool":
+            arr = pa.array(values, pa.bool_())
+        else:
+            arr = pa.array(values, pa.string())
+        arrays.append(arr)
+        fields.append(pa.field(name, arr.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+
+def write_parquet(dataset: str, rows: Iterable[Dict], sink: BinaryIO, batch_rows: int = EXPORT_BATCH_ROWS) -> int:
+    """One row group per batch, so memory stays bounded by `batch_rows`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = DATASETS[dataset]
+    writer, count = None, 0
+    for batch in _batches(rows, batch_rows):
+        record_batch = _arrow_batch(columns, batch)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, record_batch.schema, compression="zstd")
+        writer.write_table(pa.Table.from_batches([record_batch]))
+        count += len(batch)
+    if writer is None:
+        writer = pq.ParquetWriter(sink, _arrow_batch(columns, []).schema, compression="zstd")
+    writer.close()
+    return count
+
+def _arena(values: List[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """utf-8 bytes of all strings back to back plus int64 offsets (Arrow layout)."""
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def write_npz(dataset: str, rows: Iterable[Dict], sink: BinaryIO) -> int:
+    """
+    Compact NumPy export for environments without pyarrow. Per column:
+        str  -> <name>.data (uint8) + <name>.offsets (int64)
+        cat  -> <name>.codes (int32, -1 = missing) + <name>.dict.data/.dict.offsets
+        f32  -> float32 with NaN, ts -> datetime64[ms] with NaT, bool -> bool
+    Read back with read_npz().
+    """
+    columns = DATASETS[dataset]
+    rows = list(rows)
+    arrays = {"__schema__": np.frombuffer(json.dumps(columns).encode("utf-8"), dtype=np.uint8)}
+    for name, kind in columns:
+        values = [r[name] for r in rows]
+        if kind == "cat":
+            categories = sorted({v for v in values if v is not None})
+            lookup = {v: i for i, v in enumerate(categories)}
+            arrays[f"{name}.codes"] = np.array([lookup.get(v, -1) for v in values], dtype=np.int32)
+            arrays[f"{name}.dict.data"], arrays[f"{name}.dict.offsets"] = _arena(categories)
+        elif kind == "str":
+            arrays[f"{name}.data"], arrays[f"{name}.offsets"] = _arena(values)
+        elif kind == "f32":
+            arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+        elif kind == "ts":
+            arrays[name] = np.array(["NaT" if v is None else v for v in values], dtype="datetime64[ms]")
+        else:
+            arrays[name] = np.array(values, dtype=bool)
+    np.savez_compressed(sink, **arrays)
+    return len(rows)
+
+def _strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def read_npz(source) -> Dict[str, object]:
+    """Load an npz export: cat columns come back as (codes, categories) tuples."""
+    with np.load(source) as npz:
+        columns = json.loads(npz["__schema__"].tobytes())
+        out = {}
+        for name, kind in columns:
+            if kind == "cat":
+                out[name] = (npz[f"{name}.codes"], _strings(npz[f"{name}.dict.data"], npz[f"{name}.dict.offsets"]))
+            elif kind == "str":
+                out[name] = _strings(npz[f"{name}.data"], npz[f"{name}.offsets"])
+            else:
+                out[name] = npz[name]
+        return out
+
+def export(dataset: str, fmt: str, sink: BinaryIO, since_ms: Optional[int] = None, seen: Collection[str] = ()) -> Dict:
+    """
+    Write `dataset` to `sink`. Returns the row count, the new watermark, and
+    `seen`: the digests of rows exported at exactly that watermark, to pass
+    back with it next time so they aren't exported again.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"unknown dataset '{dataset}', expected one of {sorted(DATASETS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}', expected one of {FORMATS}")
+
+    watermark = since_ms or 0
+    at_watermark: List[Dict] = []
+
+    def tracked(rows):
+        nonlocal watermark, at_watermark
+        for row in rows:
+            mark = watermark_of(dataset, row)
+            if mark > watermark:
+                watermark, at_watermark = mark, []
+            if mark == watermark:
+                at_watermark.append(row)
+            yield row
+
+    rows = tracked(iter_rows(dataset, since_ms, seen))
+    count = write_parquet(dataset, rows, sink) if fmt == "parquet" else write_npz(dataset, rows, sink)
+    digests = {row_digest(row) for row in at_watermark}
+    if since_ms is not None and watermark == since_ms:
+        digests.update(seen)
+    return {"rows": count, "watermark": watermark, "seen": sorted(digests)}
+
+# -----------------------------
+# Persistent watermarks (CLI exports)
+# -----------------------------
+# watermarks.json: {dataset: {"watermark": ms, "seen": [row digests at ms]}}
+def load_watermarks(path: Path) -> Dict[str, Dict]:
+    if not path.exists():
+        return {}
+    watermarks = json.loads(path.read_text(encoding="utf-8"))
+    # files written before "seen" existed hold the bare watermark
+    return {dataset: w if isinstance(w, dict) else {"watermark": w, "seen": []} for dataset, w in watermarks.items()}
+
+def save_watermarks(path: Path, watermarks: Dict[str, Dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(watermarks, indent=2), encoding="utf-8")
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from ..config import LLM_COALESCE  # importing config also loads .env
+from . import admission
+
+DEFAULT_API_VERSION = "2024-02-15-preview"
+
+# -----------------------------
+# Lazily-built Azure OpenAI clients
+# -----------------------------
+# The openai SDK is slow to import and building a client at module level means
+# every replica pays for it before it can answer /health. Clients are created
+# on first use instead and shared afterwards (one per api_version).
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_version: Optional[str] = None):
+    """Return the shared AzureOpenAI client, creating it on first call."""
+    version = api_version or DEFAULT_API_VERSION
+    client = _clients.get(version)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(version)
+        if client is None:
+            from openai import AzureOpenAI
+
+            client = AzureOpenAI(
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                api_version=version,
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+            )
+            _clients[version] = client
+    return client
+
+
+def deployment() -> Optional[str]:
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+
+# -----------------------------
+# Single-flight completions
+# -----------------------------
+# Concurrent calls with the same deployment, messages and parameters share one
+# upstream request: the first caller makes it, the others wait for its result
+# (or its exception). Only in-flight calls are merged; nothing is cached.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _flight_key(api_version: Optional[str], params: Dict) -> str:
+    raw = json.dumps([api_version or DEFAULT_API_VERSION, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _call_upstream(api_version: Optional[str], params: Dict):
+    # the admission gate adapts to the latency of successful upstream calls
+    # only (failures are often fast and say nothing about load), see AdmissionGate
+    started = time.perf_counter()
+    resp = get_client(api_version).chat.completions.create(**params)
+    admission.observe_llm_latency(time.perf_counter() - started)
+    return resp
+
+
+def create_completion(messages: List[Dict], api_version: Optional[str] = None, **params):
+    """chat.completions.create on the shared client, merged with identical calls in flight."""
+    params = {"model": deployment(), "messages": messages, **params}
+    if not LLM_COALESCE or params.get("temperature", 1) != 0:
+        # sampled completions are expected to differ between callers
+        return _call_upstream(api_version, params)
+
+    key = _flight_key(api_version, params)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        future.set_result(_call_upstream(api_version, params))
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+    return future.result()
+
+
+def complete(messages: List[Dict], api_version: Optional[str] = None, **params) -> str:
+    """Text of the first choice, stripped."""
+    resp = create_completion(messages, api_version, **params)
+    return (resp.choices[0].message.content or "").strip()
+
+
+def complete_json(messages: List[Dict], name: str, schema: Dict, api_version: Optional[str] = None, **params) -> Dict:
+    """
+    Ask for an object matching `schema` by forcing a call to a function `name`
+    that takes it as parameters, and parse the arguments with parse_json().
+    Raises ValueError if the output was cut at max_tokens, or if it isn't an
+    object with every `required` key (nested objects included).
+    """
+    resp = create_completion(
+        messages, api_version,
+        tools=[{"type": "function", "function": {"name": name, "parameters": schema}}],
+        tool_choice={"type": "function", "function": {"name": name}},
+        **params,
+    )
+    choice = resp.choices[0]
+    # parse_json would repair a cut-off object into one that looks complete
+    if getattr(choice, "finish_reason", None) == "length":
+        raise ValueError(f"{name}: output truncated at max_tokens")
+    message = choice.message
+    # some deployments answer in content instead of a tool call
+    text = message.tool_calls[0].function.arguments if message.tool_calls else message.content
+    data = parse_json(text or "")
+    if not isinstance(data, dict):
+        raise ValueError(f"{name}: expected a JSON object, got {type(data).__name__}")
+    missing = _missing(schema, data)
+    if missing:
+        raise ValueError(f"{name}: missing {', '.join(missing)}")
+    return data
+
+
+def _missing(schema: Dict, data: Dict, prefix: str = "") -> List[str]:
+    """Dotted paths of `required` keys absent from `data` or from its nested objects."""
+    missing = [prefix + key for key in schema.get("required", []) if key not in data]
+    for key, sub in (schema.get("properties") or {}).items():
+        if key not in data or sub.get("type") != "object":
+            continue
+        if isinstance(data[key], dict):
+            missing += _missing(sub, data[key], f"{prefix}{key}.")
+        else:
+            missing.append(f"{prefix}{key} (not an object)")
+    return missing
+
+# -----------------------------
+# Tolerant JSON parsing
+# -----------------------------
+class JsonScanner:
+    """
+    Incremental scanner for the first JSON value in model output.
+
+    Text before the value (prose, ```json fences) is skipped, so is anything
+    after it. Trailing commas are dropped as they are seen. If the text ends
+    early (max_tokens, a cut stream) value() closes what is still open and
+    falls back to the last complete member.
+    """
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        # buffer length and open brackets at each separator, for truncated output
+        self._cuts: List[tuple] = []
+
+    def feed(self, chunk: str) -> bool:
+        """Consume more text; returns True once the value is complete."""
+        for ch in chunk:
+            if self.done:
+                break
+            if not self.stack:
+                if ch in "{[":
+                    self.stack.append("}" if ch == "{" else "]")
+                    self.buffer.append(ch)
+                continue
+
+            if self.in_string:
+                self.buffer.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.stack.append("}" if ch == "{" else "]")
+            elif ch in "}]":
+                self._drop_trailing_comma()
+                self.stack.pop()
+                self.buffer.append(ch)
+                self.done = not self.stack
+                continue
+            elif ch == ",":
+                self._cuts.append((len(self.buffer), list(self.stack)))
+            self.buffer.append(ch)
+        return self.done
+
+    def _drop_trailing_comma(self):
+        i = len(self.buffer) - 1
+        while i >= 0 and self.buffer[i].isspace():
+            i -= 1
+        if i >= 0 and self.buffer[i] == ",":
+            del self.buffer[i:]
+
+    def value(self):
+        if not self.buffer:
+            raise ValueError("no JSON value found")
+        text = "".join(self.buffer)
+        if self.done:
+            return json.loads(text)
+
+        closed = text + ('"' if self.in_string else "")
+        candidates = [(closed, self.stack)] + [(text[:n], stack) for n, stack in reversed(self._cuts)]
+        for partial, stack in candidates:
+            partial = partial.rstrip().rstrip(",")
+            if partial.endswith(":"):
+                continue  # key without a value
+            try:
+                return json.loads(partial + "".join(reversed(stack)))
+            except ValueError:
+                continue
+        # nothing complete inside: an empty container of the outer type
+        return json.loads(text[0] + self.stack[0])
+
+
+def parse_json(text: str):
+    """First JSON value in `text`, repaired if it was cut short."""
+    error = ValueError("no JSON value found")
+    # a bracket in leading prose ("[note] {...}") is not the value: try the next one
+    for start in (i for i, ch in enumerate(text) if ch in "{["):
+        scanner = JsonScanner()
+        scanner.feed(text[start:])
+        try:
+            return scanner.value()
+        except ValueError as e:
+            error = e
+    raise error
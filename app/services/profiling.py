@@ -0,0 +1,177 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..config import PROFILE_DIR, PROFILE_MAX_CAPTURES, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_SLOW_MS
+
+# -----------------------------
+# Per-request profile
+# -----------------------------
+# Nothing here runs unless a request is being profiled: stage() and timed()
+# only read a context variable and return when it is unset.
+_current: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar("profile", default=None)
+
+# admin toggle: profile every request until switched off
+state = {"enabled": False}
+
+
+class Profile:
+    def __init__(self, method: str, path: str, reason: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.reason = reason  # "header" | "toggle" | None (slow-request watch)
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.stages: List[Dict] = []
+        self.samples: Counter = Counter()
+        self.threads = set()
+        self._sampler: Optional["_Sampler"] = None
+        self._token = None
+
+    # ---- stack sampling ----
+    def start_sampling(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        if self._sampler is None:
+            self._sampler = _Sampler(self, interval_ms / 1000)
+            self._sampler.start()
+
+    def stop_sampling(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.join(timeout=1.0)
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def to_dict(self, status_code: int, duration_ms: float) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason or "slow",
+            "status_code": status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(duration_ms, 2),
+            "stages": self.stages,
+            "samples": sum(self.samples.values()),
+            "folded": self.folded(),
+        }
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Polls the stacks of the threads that have done work for the profile."""
+
+    def __init__(self, profile: Profile, interval: float):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.profile.threads):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.profile.samples[";".join(reversed(stack))] += 1
+
+
+def current() -> Optional[Profile]:
+    return _current.get()
+
+def begin(method: str, path: str, requested: bool) -> Optional[Profile]:
+    """Start profiling a request if it asked for it, the toggle is on, or slow capture is enabled."""
+    reason = "header" if requested else "toggle" if state["enabled"] else None
+    if reason is None and PROFILE_SLOW_MS <= 0:
+        return None
+    profile = Profile(method, path, reason)
+    if reason is not None:
+        profile.start_sampling()
+    profile._token = _current.set(profile)
+    return profile
+
+def end(profile: Profile):
+    profile.stop_sampling()
+    _current.reset(profile._token)
+
+# -----------------------------
+# Stage timing
+# -----------------------------
+@contextmanager
+def stage(name: str):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.threads.add(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ended = time.perf_counter()
+        profile.stages.append({
+            "stage": name,
+            "start_ms": round((started - profile.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+        })
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# -----------------------------
+# On-disk ring buffer
+# -----------------------------
+def save_capture(capture: Dict, directory: Path = PROFILE_DIR, keep: int = PROFILE_MAX_CAPTURES):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{int(capture['started_at'] * 1000)}-{capture['id']}.json"
+    path.write_text(json.dumps(capture, indent=2), encoding="utf-8")
+    # oldest captures go first once the buffer is full
+    for old in sorted(directory.glob("*.json"))[:-keep]:
+        old.unlink(missing_ok=True)
+
+def list_captures(directory: Path = PROFILE_DIR) -> List[Dict]:
+    if not directory.exists():
+        return []
+    captures = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data.pop("folded", None)
+        data.pop("stages", None)
+        captures.append(data)
+    return captures
+
+def load_capture(capture_id: str, directory: Path = PROFILE_DIR) -> Optional[Dict]:
+    for path in directory.glob(f"*-{capture_id}.json"):
+        return json.loads(path.read_text(encoding="utf-8"))
+    return None
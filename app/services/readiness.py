@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# -----------------------------
+# Liveness vs readiness
+# -----------------------------
+# /health only says the process is up. /ready flips once every registered
+# warm-up step (loading stores, building indexes, ...) has finished, so the
+# load balancer doesn't route traffic to a replica that is still cold.
+_warmers: List[Tuple[str, Callable[[], Any]]] = []
+_ready = asyncio.Event()
+_state: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "ready_at": None,
+    "steps": {},
+    "error": None,
+}
+
+
+def register_warmup(name: str, fn: Callable[[], Any]):
+    """Register a blocking callable that must run before the app reports ready."""
+    _warmers.append((name, fn))
+
+
+async def warm_up():
+    _state["started_at"] = time.time()
+    for name, fn in _warmers:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(fn)
+        except Exception as e:
+            # A failed warm-up isn't fatal: the data is loaded on demand anyway.
+            logging.warning(f"[readiness] warm-up step '{name}' failed: {e}")
+            _state["error"] = f"{name}: {e}"
+        _state["steps"][name] = round(time.perf_counter() - started, 4)
+
+    _state["ready"] = True
+    _state["ready_at"] = time.time()
+    _ready.set()
+    logging.info(f"[readiness] ready after {_state['ready_at'] - _state['started_at']:.3f}s")
+
+
+async def wait_ready():
+    await _ready.wait()
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def status() -> Dict[str, Any]:
+    return dict(_state, steps=dict(_state["steps"]))
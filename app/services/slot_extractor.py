@@ -1,9 +1,9 @@
 from typing import Dict
-from dotenv import load_dotenv
-import os, json
-from openai import AzureOpenAI
+import os
+from .llm import complete_json
+from . import profiling
+from ..config import AGGREGATE_WEIGHTS
 
-load_dotenv()
 # -----------------------------
 # Keyword dictionaries
 # -----------------------------
@@ -14,6 +14,8 @@ ISSUE_TYPES = {
     'change': ['change', 'update', 'schema', 'migrations', 'patch']
 }
 
+SEVERITIES = ["critical", "high", "medium", "low"]
+
 SYSTEMS = [
     'crm', 'erp', 'email system', 'database', 'network',
     'web portal', 'mobile app', 'api', 'reporting module',
@@ -30,12 +32,20 @@ def fuzzy_find(hay: str, needles):
             return n
     return "unknown"
 
-def calculate_aggregate(conf: Dict) -> float:
-    """Weighted average aggregate confidence."""
+def keyword_severity(description: str) -> str:
+    """Cheap severity guess from keywords; also used to pre-score queued tickets."""
+    desc = description.lower()
+    for level in SEVERITIES:
+        if level in desc:
+            return level
+    return "low"
+
+def calculate_aggregate(conf: Dict, weights: Dict = AGGREGATE_WEIGHTS) -> float:
+    """Weighted average aggregate confidence (weights from AGGREGATE_WEIGHTS)."""
     return round(
-        conf.get("issue_type", 0) * 0.5 +
-        conf.get("severity", 0) * 0.25 +
-        conf.get("affected_system", 0) * 0.25,
+        conf.get("issue_type", 0) * weights["issue_type"] +
+        conf.get("severity", 0) * weights["severity"] +
+        conf.get("affected_system", 0) * weights["affected_system"],
         2
     )
 
@@ -52,11 +62,7 @@ def fallback_extract(description: str) -> Dict:
             issue_type = k
             break
 
-    severity = "low"
-    for level in ["critical", "high", "medium", "low"]:
-        if level in desc:
-            severity = level
-            break
+    severity = keyword_severity(desc)
 
     affected = fuzzy_find(desc, SYSTEMS)
 
@@ -77,21 +83,30 @@ def fallback_extract(description: str) -> Dict:
 # -----------------------------
 # Azure OpenAI extractor
 # -----------------------------
-def extract_with_openai(description: str) -> Dict:
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT",None)
-    api_key = os.getenv("AZURE_OPENAI_API_KEY",None)
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT",None)
-
-    print("ENV:", endpoint, api_key, deployment, os.getenv("AZURE_API_VERSION"))
+_CONFIDENCE = {"type": "number", "minimum": 0, "maximum": 1}
+
+SLOTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "issue_type": {"type": "string", "enum": ["bug", "incident", "service request", "change", "outage"]},
+        "severity": {"type": "string", "enum": ["low", "medium", "high", "critical"]},
+        "affected_system": {"type": "string"},
+        "confidence_scores": {
+            "type": "object",
+            "properties": {"issue_type": _CONFIDENCE, "severity": _CONFIDENCE, "affected_system": _CONFIDENCE},
+            "required": ["issue_type", "severity", "affected_system"],
+        },
+    },
+    "required": ["issue_type", "severity", "affected_system", "confidence_scores"],
+}
 
-    if not endpoint or not api_key or not deployment:
-        return fallback_extract(description)
+def llm_configured() -> bool:
+    return all(os.getenv(k) for k in ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_KEY", "AZURE_OPENAI_DEPLOYMENT"))
 
-    client = AzureOpenAI(
-        api_key=api_key,
-        api_version=os.getenv("AZURE_API_VERSION"),
-        azure_endpoint=endpoint
-    )
+def llm_extract(description: str) -> Dict:
+    """Slots from Azure OpenAI only; raises if it isn't configured or the call fails."""
+    if not llm_configured():
+        raise RuntimeError("Azure OpenAI is not configured")
 
     prompt = f"""
     Extract the following information from this IT ticket description:
@@ -116,26 +131,26 @@ def extract_with_openai(description: str) -> Dict:
     }}
     """
 
-    try:
-        completion = client.chat.completions.create(
-            model=deployment,
-            messages=[
-                {"role": "system", "content": "You are an IT ticket classification expert. Extract information accurately and provide confidence scores."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,
-            max_tokens=300
-        )
-
-        text = completion.choices[0].message.content
-        data = json.loads(text)
-
-        if "confidence_scores" not in data:
-            raise ValueError("Missing confidence_scores in response")
+    # concurrent extractions of the same description (poller and chat) share one call
+    data = complete_json(
+        [
+            {"role": "system", "content": "You are an IT ticket classification expert. Extract information accurately and provide confidence scores."},
+            {"role": "user", "content": prompt}
+        ],
+        "record_slots", SLOTS_SCHEMA, os.getenv("AZURE_API_VERSION"),
+        temperature=0,
+        max_tokens=300
+    )
 
-        data["aggregate_confidence"] = calculate_aggregate(data["confidence_scores"])
-        return data
+    data["aggregate_confidence"] = calculate_aggregate(data["confidence_scores"])
+    return data
 
+@profiling.timed("extract_slots")
+def extract_with_openai(description: str) -> Dict:
+    if not llm_configured():
+        return fallback_extract(description)
+    try:
+        return llm_extract(description)
     except Exception as e:
         print(f"[extract_with_openai] error: {e}")
         return fallback_extract(description)
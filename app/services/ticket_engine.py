@@ -1,8 +1,14 @@
-import json, time, asyncio, datetime
+import json, os, asyncio, datetime, threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from .slot_extractor import extract_with_openai
-from ..config import TICKETS_PATH, CONFIDENCE_CLOSE_THRESHOLD, POLL_INTERVAL_SECONDS
+from typing import Callable, Dict, List, Tuple, Optional
+from .slot_extractor import extract_with_openai, calculate_aggregate
+from ..config import (
+    TICKETS_PATH, QUEUE_PATH, CONFIDENCE_CLOSE_THRESHOLD, POLL_INTERVAL_SECONDS, POLL_INITIAL_DELAY_SECONDS,
+    QUEUE_INTERACTIVE_WORKERS, QUEUE_BULK_WORKERS, QUEUE_BULK_BATCH, QUEUE_INTERACTIVE_TIMEOUT_SECONDS,
+)
+from . import readiness, profiling
+from .work_queue import TicketQueue, INTERACTIVE, BULK
 from ..models.schemas import TicketSlots
 import logging
 
@@ -11,28 +17,92 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s",
 )
 
+# serialises read-modify-write cycles on the JSON stores
+_store_lock = threading.RLock()
+
+ticket_queue = TicketQueue(QUEUE_PATH)
+
+
+# -----------------------------
+# Store versions (used for ETags and the hot table)
+# -----------------------------
+# A store's version is its file's mtime and size, so every replica serving the
+# same files hands out the same ETags, and they survive restarts. Writes to
+# one store (memory.json) leave the others' versions alone. Our own writes
+# nudge the mtime forward when the filesystem clock hasn't moved since the
+# last version we saw, so two quick writes never share a version.
+_last_mtime: Dict[Path, int] = {}
+_version_lock = threading.Lock()
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def bump_store_version(path: Path):
+    """Make sure a write we just made to `path` moved its version forward."""
+    with _version_lock:
+        signature = _file_signature(path)
+        if signature is None:
+            return
+        floor = _last_mtime.get(path, -1)
+        if signature[0] <= floor:
+            os.utime(path, ns=(floor + 1, floor + 1))
+        _last_mtime[path] = max(signature[0], floor + 1)
+
+def file_version(path: Path) -> str:
+    signature = _file_signature(path)
+    if signature is None:
+        return "0"
+    with _version_lock:
+        _last_mtime[path] = max(_last_mtime.get(path, -1), signature[0])
+    return f"{signature[0]:x}-{signature[1]:x}"
+
+def store_version(*paths: Path) -> str:
+    return ".".join(file_version(p) for p in paths)
 
 
 def load_json(path: Path):
     if not path.exists():
         return []
-    with path.open('r', encoding='utf-8') as f:
+    with profiling.stage(f"load_json:{path.name}"), path.open('r', encoding='utf-8') as f:
         return json.load(f)
 
 def save_json(path: Path, data):
-    with path.open('w', encoding='utf-8') as f:
+    with profiling.stage(f"save_json:{path.name}"), path.open('w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    bump_store_version(path)
+
+def update_tickets(path: Path, mutate: Callable[[List[Dict]], object]):
+    """Load tickets, apply `mutate` and save them if it returned something truthy."""
+    with _store_lock:
+        data = load_json(path)
+        result = mutate(data)
+        if result:
+            save_json(path, data)
+            _remember_ticket_numbers(path, data)
+        return result
+
+# ticket_no set per tickets file, refreshed by update_tickets from the list it
+# just saved, so existence checks need neither a json.load nor a table rebuild
+_ticket_numbers: Dict[Path, Tuple[str, frozenset]] = {}
+
+def _remember_ticket_numbers(path: Path, data: List[Dict]):
+    _ticket_numbers[path] = (file_version(path), frozenset(t.get("ticket_no") for t in data))
+
+def ticket_numbers(path: Path) -> frozenset:
+    """Ticket numbers currently in `path`; only reloads it after an outside write."""
+    with _store_lock:
+        cached = _ticket_numbers.get(path)
+        if cached is None or cached[0] != file_version(path):
+            _remember_ticket_numbers(path, load_json(path))
+        return _ticket_numbers[path][1]
 
 def weighted_confidence(result: Dict) -> float:
-    scores = result["confidence_scores"]
-    return (
-        scores["issue_type"] * 0.4 +
-        scores["severity"] * 0.3 +
-        scores["affected_system"] * 0.3
-    )
-
-
-
+    # same weights as the aggregate used for auto-close (see AGGREGATE_WEIGHTS)
+    return calculate_aggregate(result["confidence_scores"])
 
 def propose_fix(result: Dict) -> str:
     it = result['issue_type']
@@ -42,43 +112,105 @@ def propose_fix(result: Dict) -> str:
             f"check recent changes and logs, and validate with a test case. "
             f"If stable, roll to staging then production.")
 
-async def process_tickets_once(tickets_path: Path):
-    data = load_json(tickets_path)
-    changed = False
-    for t in data:
-        if (
-            t.get('status') in ('closed', 'needs-review')
-            or ("slots" in t and t["slots"].get("aggregate_confidence") is not None)
-        ):
-            continue
-
-        # 👇 New ticket found
-        logging.info(f"[Ticket {t['ticket_no']}] New ticket found. Processing...")
-
-        desc = t.get('description', '')
-        result = extract_with_openai(desc)
-
-        t['slots'] = result
-        logging.info(f"[Ticket {t['ticket_no']}] Aggregate confidence = {result['aggregate_confidence']}")
-
-        if result["aggregate_confidence"] >= CONFIDENCE_CLOSE_THRESHOLD:
-            t['proposedFix'] = propose_fix(result)
-            t['status'] = 'closed'
-        else:
-            t['status'] = 'needs-review'
-
-        t.setdefault('metadata', {})['updatedAt'] = datetime.datetime.utcnow().isoformat() + 'Z'
-        changed = True
+def needs_processing(t: Dict) -> bool:
+    return not (
+        t.get('status') in ('closed', 'needs-review')
+        or (t.get("slots") or {}).get("aggregate_confidence") is not None
+    )
 
-    if changed:
-        save_json(tickets_path, data)
-    return changed
+def apply_extraction(t: Dict, result: Dict):
+    t['slots'] = result
+    logging.info(f"[Ticket {t['ticket_no']}] Aggregate confidence = {result['aggregate_confidence']}")
+
+    if result["aggregate_confidence"] >= CONFIDENCE_CLOSE_THRESHOLD:
+        t['proposedFix'] = propose_fix(result)
+        t['status'] = 'closed'
+    else:
+        t['status'] = 'needs-review'
+
+    t.setdefault('metadata', {})['updatedAt'] = datetime.datetime.utcnow().isoformat() + 'Z'
+
+# -----------------------------
+# Queue-driven processing
+# -----------------------------
+def enqueue_pending(tickets_path: Path) -> int:
+    """Put every ticket that still needs extraction on the queue."""
+    pending = [t for t in load_json(tickets_path) if needs_processing(t)]
+    added = ticket_queue.enqueue_many(pending)
+    if added:
+        logging.info(f"[queue] {added} new tickets queued")
+    return added
+
+def process_queued_batch(entries: List[Dict], tickets_path: Path = TICKETS_PATH) -> Dict[str, Optional[Dict]]:
+    """
+    Extract slots for a batch of queued tickets and write all results back in
+    one save. Returns the current ticket (or None if it is gone) per ticket_no.
+    """
+    wanted = {e["ticket_no"] for e in entries}
+    descriptions = {e["ticket_no"]: e["description"] for e in entries if "description" in e}
+    if len(descriptions) < len(wanted):
+        # entries queued before descriptions were stored with them
+        descriptions.update({
+            t["ticket_no"]: t.get("description", "")
+            for t in load_json(tickets_path)
+            if t.get("ticket_no") in wanted and t["ticket_no"] not in descriptions
+        })
+
+    results = {}
+    for entry in entries:
+        ticket_no = entry["ticket_no"]
+        if ticket_no in descriptions:
+            logging.info(f"[Ticket {ticket_no}] Processing ({entry.get('lane')} lane, {entry.get('severity')})...")
+            results[ticket_no] = extract_with_openai(descriptions[ticket_no] or "")
+
+    current: Dict[str, Dict] = {}
+
+    def _apply(data):
+        changed = False
+        for t in data:
+            ticket_no = t.get("ticket_no")
+            if ticket_no in wanted:
+                if ticket_no in results and needs_processing(t):
+                    apply_extraction(t, results[ticket_no])
+                    changed = True
+                current[ticket_no] = t
+        return changed
+
+    if results:
+        update_tickets(tickets_path, _apply)
+    return {no: current.get(no) for no in wanted}
+
+def process_interactive(ticket: Dict, timeout: float = QUEUE_INTERACTIVE_TIMEOUT_SECONDS) -> Optional[Dict]:
+    """
+    Run a chat-created ticket through the interactive lane and wait for it.
+    Returns the processed ticket, or None if it is still queued after `timeout`.
+    """
+    if not ticket_queue.running:
+        return process_queued_batch([ticket])[ticket["ticket_no"]]
+    try:
+        with profiling.stage("extraction_queue_wait"):
+            return ticket_queue.submit(ticket, INTERACTIVE).result(timeout)
+    except FutureTimeoutError:
+        return None
+
+def start_queue_workers():
+    return ticket_queue.run_workers(
+        process_queued_batch,
+        {INTERACTIVE: QUEUE_INTERACTIVE_WORKERS, BULK: QUEUE_BULK_WORKERS},
+        {INTERACTIVE: 1, BULK: QUEUE_BULK_BATCH},
+    )
 
 async def poller():
+    # Don't compete with startup: wait until the app is ready, then give the
+    # first requests a moment before doing a full pass over the file.
+    await readiness.wait_ready()
+    start_queue_workers()
+    await asyncio.sleep(POLL_INITIAL_DELAY_SECONDS)
     while True:
         logging.info("Checking for new tickets...")
         try:
-            await process_tickets_once(TICKETS_PATH)
+            # the scan only queues work; lane workers do the extraction
+            await asyncio.to_thread(enqueue_pending, TICKETS_PATH)
         except Exception as e:
             # log to console
             print("[poller] error:", e)
@@ -0,0 +1,338 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import TICKETS_PATH
+from .ticket_engine import load_json, file_version
+
+SLOT_FIELDS = ("issue_type", "severity", "affected_system")
+CODED = ("status", "issue_type", "severity", "affected_system", "created_by", "last_review_action")
+TEXT = ("description", "proposedFix", "review_summary", "resolution_steps")
+TIMESTAMPS = ("createdAt", "updatedAt")
+_ROW_KEYS = {"ticket_no", "status", "slots", "metadata"} | set(TEXT)
+_SLOT_KEYS = set(SLOT_FIELDS) | {"confidence_scores", "aggregate_confidence"}
+_META_KEYS = set(TIMESTAMPS) | {"createdBy", "lastReviewAction"}
+
+# -----------------------------
+# Column helpers
+# -----------------------------
+class Vocabulary:
+    """Interns the distinct values of a low-cardinality column; code -1 is missing."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return None if code < 0 else self.values[code]
+
+    def codes_where(self, predicate) -> List[int]:
+        return [i for i, v in enumerate(self.values) if predicate(v)]
+
+
+class StringArena:
+    """
+    Distinct strings of a column as one utf-8 buffer plus offsets, and an int32
+    code per row into it (-1 = missing). Repeated text such as generated
+    proposedFix strings is stored once.
+    """
+
+    def __init__(self, values: List[Optional[str]]):
+        distinct: Dict[str, int] = {}
+        self.codes = np.array(
+            [-1 if v is None else distinct.setdefault(v, len(distinct)) for v in values],
+            dtype=np.int32,
+        )
+        encoded = [v.encode("utf-8") for v in distinct]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.data = b"".join(encoded)
+
+    def get(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        if code < 0:
+            return None
+        return self.data[self.offsets[code]:self.offsets[code + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.nbytes + self.codes.nbytes
+
+
+_NAN = float("nan")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_us(value) -> Tuple[int, bool]:
+    """Microseconds since the epoch (-1 if `value` isn't a ...Z timestamp), and whether _from_us gives `value` back."""
+    if not isinstance(value, str) or not value.endswith("Z"):
+        return -1, False
+    try:
+        dt = datetime.fromisoformat(value[:-1])
+    except ValueError:
+        return -1, False
+    exact = dt.tzinfo is None and dt.isoformat() == value[:-1]
+    us = (dt.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    return (us, exact) if us >= 0 else (-1, False)
+
+def _from_us(us: int) -> str:
+    # same shape as datetime.utcnow().isoformat() + "Z"
+    dt = datetime.fromtimestamp(us // 1_000_000, tz=timezone.utc).replace(microsecond=us % 1_000_000, tzinfo=None)
+    return dt.isoformat() + "Z"
+
+def _conf(value) -> float:
+    # exact types: bool is an int subclass, and json never makes subclasses
+    return float(value) if type(value) in (int, float) else _NAN
+
+# -----------------------------
+# Columnar ticket set
+# -----------------------------
+class TicketTable:
+    """
+    Read-only, columnar copy of a ticket list.
+
+    Enumerated fields are coded against shared vocabularies, confidences live in
+    float32 arrays, free text in string arenas, timestamps as int64 microseconds.
+    Ticket dicts are only rebuilt for the rows a caller asks for (row/rows).
+    Whatever doesn't fit the columns (extra keys, odd shapes) is kept per row in
+    `extras`, and rows the columns can't reproduce exactly are kept whole in
+    `_overrides`, so row(i) always equals the original dict. _encode spots
+    those rows as it goes; verify=True also decodes every row and compares it
+    with the original (slow, for tests and the benchmark).
+    """
+
+    def __init__(self, tickets: List[Dict], verify: bool = False):
+        self.vocab = {name: Vocabulary() for name in CODED}
+        self.extras: Dict[int, Dict] = {}
+        self._overrides: Dict[int, Dict] = {}
+
+        # collected as plain lists and converted once; writing numpy arrays
+        # element by element costs more than the encoding itself
+        columns = {name: [] for name in CODED + TIMESTAMPS + TEXT
+                   + ("ticket_no", "conf", "aggregate", "has_slots", "has_metadata")}
+        for i, t in enumerate(tickets):
+            self._encode(i, t, columns)
+
+        n = len(tickets)
+        # most vocabularies fit in a byte
+        self.codes = {}
+        for name, vocab in self.vocab.items():
+            dtype = np.int8 if len(vocab.values) < 2**7 else np.int16 if len(vocab.values) < 2**15 else np.int32
+            self.codes[name] = np.array(columns[name], dtype=dtype)
+        conf = np.array(columns["conf"], dtype=np.float64).reshape(n, len(SLOT_FIELDS))
+        aggregate = np.array(columns["aggregate"], dtype=np.float64)
+        self.conf = conf.astype(np.float32)
+        self.aggregate = aggregate.astype(np.float32)
+        self.timestamps = {name: np.array(columns[name], dtype=np.int64) for name in TIMESTAMPS}
+        self.has_slots = np.array(columns["has_slots"], dtype=bool)
+        self.has_metadata = np.array(columns["has_metadata"], dtype=bool)
+        self.text = {name: StringArena(columns[name]) for name in TEXT}
+        self.ticket_no = np.array(columns["ticket_no"], dtype=bytes) if n else np.array([], dtype="S1")
+        self._by_ticket_no = np.argsort(self.ticket_no, kind="stable").astype(np.int32)
+
+        # confidences that don't survive float32 + round(6) as _decode does it
+        def _inexact(original, stored):
+            with np.errstate(over="ignore", invalid="ignore"):
+                return ~np.isnan(original) & (np.round(stored.astype(np.float64), 6) != original)
+        inexact = _inexact(conf, self.conf).any(axis=1) | _inexact(aggregate, self.aggregate)
+        for i in np.flatnonzero(inexact).tolist():
+            self._overrides[i] = tickets[i]
+
+        if verify:
+            for i, t in enumerate(tickets):
+                if i not in self._overrides and self._decode(i) != t:
+                    self._overrides[i] = t
+
+    def __len__(self) -> int:
+        return len(self.ticket_no)
+
+    # ---- encoding ----
+    def _encode(self, i: int, t: Dict, columns: Dict[str, List]):
+        """Append row i to `columns`; rows _decode can't give back as they are go to _overrides."""
+        # confidence precision is checked for all rows at once in __init__
+        ticket_no = t.get("ticket_no")
+        exact = isinstance(ticket_no, str)
+        columns["ticket_no"].append(ticket_no.encode("utf-8") if exact else b"")
+        for name in ("status",) + TEXT:
+            value = t.get(name)
+            if not isinstance(value, str):
+                value = None
+                exact = exact and name not in t
+            columns[name].append(value)
+        columns["status"][-1] = self.vocab["status"].code(columns["status"][-1])
+
+        slots = t.get("slots")
+        if isinstance(slots, dict):
+            exact = exact and slots.keys() <= _SLOT_KEYS
+            for field in SLOT_FIELDS:
+                value = slots.get(field)
+                if not isinstance(value, str):
+                    value = None
+                    exact = exact and field not in slots
+                columns[field].append(self.vocab[field].code(value))
+            scores = slots.get("confidence_scores")
+            if isinstance(scores, dict):
+                conf = [_conf(scores.get(field)) for field in SLOT_FIELDS]
+                # non-empty, and every key is a slot field with a number
+                exact = exact and len(scores) == sum(c == c for c in conf) > 0
+            else:
+                conf = [_NAN] * len(SLOT_FIELDS)
+                exact = exact and scores is None and "confidence_scores" not in slots
+            columns["conf"].extend(conf)
+            aggregate = _conf(slots.get("aggregate_confidence"))
+            exact = exact and (aggregate == aggregate) == ("aggregate_confidence" in slots)
+            columns["aggregate"].append(aggregate)
+        else:
+            for field in SLOT_FIELDS:
+                columns[field].append(-1)
+            columns["conf"].extend([_NAN] * len(SLOT_FIELDS))
+            columns["aggregate"].append(_NAN)
+            exact = exact and "slots" not in t
+        columns["has_slots"].append(slots is not None)
+
+        meta = t.get("metadata")
+        columns["has_metadata"].append(meta is not None)
+        if isinstance(meta, dict):
+            exact = exact and meta.keys() <= _META_KEYS
+            for name, key in (("created_by", "createdBy"), ("last_review_action", "lastReviewAction")):
+                value = meta.get(key)
+                if not isinstance(value, str):
+                    value = None
+                    exact = exact and key not in meta
+                columns[name].append(self.vocab[name].code(value))
+            for name in TIMESTAMPS:
+                if name in meta:
+                    us, same = _to_us(meta[name])
+                    exact = exact and same
+                else:
+                    us = -1
+                columns[name].append(us)
+        else:
+            for name in ("created_by", "last_review_action") + TIMESTAMPS:
+                columns[name].append(-1)
+            exact = exact and "metadata" not in t
+
+        extra = {k: v for k, v in t.items() if k not in _ROW_KEYS}
+        if extra:
+            self.extras[i] = extra
+        if not exact:
+            self._overrides[i] = t
+
+    def _decode(self, i: int) -> Dict:
+        t = {"ticket_no": self.ticket_no[i].decode("utf-8")}
+        for name in TEXT:
+            value = self.text[name].get(i)
+            if value is not None:
+                t[name] = value
+
+        status = self.vocab["status"].value(self.codes["status"][i])
+        if status is not None:
+            t["status"] = status
+
+        if self.has_slots[i]:
+            slots = {}
+            for j, field in enumerate(SLOT_FIELDS):
+                value = self.vocab[field].value(self.codes[field][i])
+                if value is not None:
+                    slots[field] = value
+            if not np.isnan(self.conf[i]).all():
+                slots["confidence_scores"] = {
+                    field: round(float(c), 6) for field, c in zip(SLOT_FIELDS, self.conf[i]) if not np.isnan(c)
+                }
+            if not np.isnan(self.aggregate[i]):
+                slots["aggregate_confidence"] = round(float(self.aggregate[i]), 6)
+            t["slots"] = slots
+
+        if self.has_metadata[i]:
+            meta = {}
+            for name in TIMESTAMPS:
+                if self.timestamps[name][i] >= 0:
+                    meta[name] = _from_us(int(self.timestamps[name][i]))
+            created_by = self.vocab["created_by"].value(self.codes["created_by"][i])
+            if created_by is not None:
+                meta["createdBy"] = created_by
+            action = self.vocab["last_review_action"].value(self.codes["last_review_action"][i])
+            if action is not None:
+                meta["lastReviewAction"] = action
+            t["metadata"] = meta
+
+        t.update(self.extras.get(i, {}))
+        return t
+
+    # ---- access ----
+    def row(self, i: int) -> Dict:
+        override = self._overrides.get(i)
+        return dict(override) if override is not None else self._decode(i)
+
+    def rows(self, indices: Iterable[int]) -> List[Dict]:
+        return [self.row(int(i)) for i in indices]
+
+    def find(self, ticket_no: str) -> Optional[int]:
+        key = ticket_no.encode("utf-8")
+        pos = np.searchsorted(self.ticket_no, key, sorter=self._by_ticket_no)
+        if pos < len(self) and self.ticket_no[self._by_ticket_no[pos]] == key:
+            return int(self._by_ticket_no[pos])
+        return None
+
+    def filter(self, status: Optional[str] = None, severity: Optional[str] = None) -> np.ndarray:
+        """Row indices matching the GET /api/tickets filters, from the code columns only."""
+        mask = np.ones(len(self), dtype=bool)
+        if status:
+            mask &= np.isin(self.codes["status"], self.vocab["status"].codes_where(lambda v: v == status))
+        if severity:
+            wanted = severity.lower()
+            mask &= np.isin(self.codes["severity"], self.vocab["severity"].codes_where(lambda v: v.lower() == wanted))
+        return np.flatnonzero(mask)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the columns (extras and overrides not included)."""
+        return (
+            sum(c.nbytes for c in self.codes.values())
+            + self.conf.nbytes + self.aggregate.nbytes
+            + sum(ts.nbytes for ts in self.timestamps.values())
+            + sum(a.nbytes for a in self.text.values())
+            + self.has_slots.nbytes + self.has_metadata.nbytes
+            + self.ticket_no.nbytes + self._by_ticket_no.nbytes
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "rows": len(self),
+            "column_bytes": self.nbytes,
+            "rows_with_extras": len(self.extras),
+            "overrides": len(self._overrides),
+        }
+
+# -----------------------------
+# Shared hot-tier table
+# -----------------------------
+_hot = {"version": None, "table": None}
+_hot_lock = threading.Lock()
+
+def hot_table() -> TicketTable:
+    """Columnar view of tickets.json, rebuilt only when tickets.json itself changes."""
+    # the same file version the ticket ETags carry, so both move together
+    version = file_version(TICKETS_PATH)
+    with _hot_lock:
+        if _hot["version"] != version:
+            _hot["table"] = TicketTable(load_json(TICKETS_PATH))
+            _hot["version"] = version
+        return _hot["table"]
+
+def current_hot_table() -> Optional[TicketTable]:
+    """The hot table if it is up to date with tickets.json, without rebuilding it."""
+    with _hot_lock:
+        return _hot["table"] if _hot["version"] == file_version(TICKETS_PATH) else None
@@ -0,0 +1,337 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..config import SLA_SECONDS
+from .slot_extractor import keyword_severity
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# -----------------------------
+# Pre-scoring
+# -----------------------------
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def lane_for(ticket: Dict) -> str:
+    created_by = (ticket.get("metadata") or {}).get("createdBy")
+    return INTERACTIVE if created_by == "chat-user" else BULK
+
+def pre_score(ticket: Dict, now: Optional[float] = None) -> Dict:
+    """
+    Cheap priority for a ticket that hasn't been extracted yet.
+
+    The queue is ordered by SLA deadline (creation time + SLA for the keyword
+    severity), so both severity and age count: a critical ticket jumps ahead
+    of the backlog, but an old low-severity ticket eventually has the earliest
+    deadline and cannot starve.
+    """
+    severity = keyword_severity(ticket.get("description") or "")
+    created = parse_timestamp((ticket.get("metadata") or {}).get("createdAt"))
+    if created is None:
+        created = now or time.time()
+    return {
+        "severity": severity,
+        "created_at": created,
+        "deadline": created + SLA_SECONDS[severity],
+    }
+
+# -----------------------------
+# Persistent two-lane priority queue
+# -----------------------------
+class TicketQueue:
+    """
+    Earliest-deadline-first queue with an interactive and a bulk lane.
+
+    Entries stay in the backing file until they are acked, so tickets that were
+    in flight when the process died are picked up again on restart. Each lane
+    has its own workers (see run_workers), which keeps the backlog moving while
+    chat traffic is heavy and vice versa; idle workers take from the other lane.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.running = False
+        self._lock = threading.Lock()
+        # journal writes happen after _lock is released, in the order staged (see _stage)
+        self._write_turn = threading.Condition()
+        self._next_turn = 0
+        self._turn = 0
+        self._loaded = False
+        self._seq = itertools.count()
+        self._heaps: Dict[str, List] = {lane: [] for lane in LANES}
+        self._entries: Dict[str, Dict] = {}
+        self._in_flight: Dict[str, Dict] = {}
+        self._waiters: Dict[str, List[Future]] = {}
+        self._waits = {lane: deque(maxlen=200) for lane in LANES}
+        self._processed = {lane: 0 for lane in LANES}
+        self._journal_records = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # ---- persistence ----
+    # The backing file is an append-only journal, one JSON object per line:
+    # queued entries ({"op": "add", ...}) and acks ({"op": "ack", "ticket_no": ...}).
+    # Replaying it gives the live queue; once it has grown well past that, it
+    # is rewritten with just the live entries. _lock only guards the in-memory
+    # queue, so pop_batch on the event loop never waits for disk; callers on
+    # the loop must not write the journal themselves (see _worker).
+    COMPACT_MIN_RECORDS = 1000
+    # a big backlog is queued this many tickets per _lock hold
+    ENQUEUE_CHUNK = 1000
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path.exists():
+                return
+            content = self.path.read_text(encoding="utf-8").strip()
+            if content.startswith("["):
+                records = json.loads(content)  # queue.json written before the journal
+            else:
+                records = [json.loads(line) for line in content.splitlines() if line.strip()]
+            live: Dict[str, Dict] = {}
+            for record in records:
+                if record.pop("op", "add") == "ack":
+                    live.pop(record["ticket_no"], None)
+                else:
+                    live[record["ticket_no"]] = record
+            for entry in live.values():
+                self._push(entry)
+            self._journal_records = len(records)
+            logging.info(f"[queue] restored {len(self._entries)} queued tickets")
+
+    def _stage(self, records: List[Dict]):
+        """
+        Called under _lock: decide what goes to the journal (the records, or a
+        snapshot of the live queue if it is time to compact) and take a turn,
+        so writes land in the order the state changed. Pass the result to
+        _flush once _lock is released.
+        """
+        live = len(self._entries) + len(self._in_flight)
+        compact = self._journal_records + len(records) > max(self.COMPACT_MIN_RECORDS, 4 * live)
+        if compact:
+            records = [dict(e, op="add") for e in itertools.chain(self._entries.values(), self._in_flight.values())]
+            self._journal_records = len(records)
+        else:
+            self._journal_records += len(records)
+        turn = self._next_turn
+        self._next_turn += 1
+        return turn, compact, records
+
+    def _flush(self, staged):
+        turn, compact, records = staged
+        with self._write_turn:
+            self._write_turn.wait_for(lambda: self._turn == turn)
+            try:
+                if compact:
+                    tmp = self.path.with_suffix(".tmp")
+                    tmp.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+                    tmp.replace(self.path)
+                else:
+                    with self.path.open("a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(r) + "\n" for r in records)
+            finally:
+                self._turn += 1
+                self._write_turn.notify_all()
+
+    # ---- producer side ----
+    def _push(self, entry: Dict) -> Dict:
+        entry["seq"] = next(self._seq)
+        self._entries[entry["ticket_no"]] = entry
+        heapq.heappush(self._heaps[entry["lane"]], (entry["deadline"], entry["seq"], entry["ticket_no"]))
+        return entry
+
+    def _enqueue(self, ticket: Dict, lane: Optional[str], now: float, score: Optional[Dict] = None) -> Optional[Dict]:
+        """Queue (or promote) a ticket; returns the entry to journal, if any."""
+        ticket_no = ticket.get("ticket_no")
+        if not ticket_no or ticket_no in self._in_flight:
+            return None
+        lane = lane or lane_for(ticket)
+        existing = self._entries.get(ticket_no)
+        if existing is not None:
+            if lane == INTERACTIVE and existing["lane"] != INTERACTIVE:
+                # promote: the stale bulk heap slot is skipped on pop
+                return self._push(dict(existing, lane=INTERACTIVE))
+            return None
+        # the description travels with the entry so workers needn't re-read tickets.json
+        return self._push(dict(score or pre_score(ticket, now), ticket_no=ticket_no, lane=lane, enqueued_at=now,
+                               description=ticket.get("description") or ""))
+
+    def enqueue_many(self, tickets: List[Dict], lane: Optional[str] = None) -> int:
+        self.load()
+        now = time.time()
+        # scored outside the lock (an unlocked peek; _enqueue checks again) and
+        # queued in chunks, so pop_batch on the event loop never waits long
+        scored = [(t, None if t.get("ticket_no") in self._entries else pre_score(t, now)) for t in tickets]
+        added = 0
+        for i in range(0, len(scored), self.ENQUEUE_CHUNK):
+            with self._lock:
+                chunk = [e for e in (self._enqueue(t, lane, now, score) for t, score in scored[i:i + self.ENQUEUE_CHUNK])
+                         if e is not None]
+                staged = self._stage([dict(e, op="add") for e in chunk]) if chunk else None
+            if chunk:
+                self._flush(staged)
+                self._notify()
+                added += len(chunk)
+        return added
+
+    def submit(self, ticket: Dict, lane: str = INTERACTIVE) -> Future:
+        """Enqueue a ticket and return a future resolved once it has been processed."""
+        future: Future = Future()
+        self.load()
+        with self._lock:
+            self._waiters.setdefault(ticket["ticket_no"], []).append(future)
+            entry = self._enqueue(ticket, lane, time.time())
+            staged = self._stage([dict(entry, op="add")]) if entry is not None else None
+        if staged is not None:
+            self._flush(staged)
+        self._notify()
+        return future
+
+    # ---- consumer side ----
+    def _pop_lane(self, lane: str) -> Optional[Dict]:
+        heap = self._heaps[lane]
+        while heap:
+            _, seq, ticket_no = heapq.heappop(heap)
+            entry = self._entries.get(ticket_no)
+            if entry is None or entry["seq"] != seq:
+                continue  # acked or promoted to the other lane
+            del self._entries[ticket_no]
+            entry["started_at"] = time.time()
+            self._in_flight[ticket_no] = entry
+            self._waits[lane].append(entry["started_at"] - entry["enqueued_at"])
+            return entry
+        return None
+
+    def pop(self, preferred: str) -> Optional[Dict]:
+        batch = self.pop_batch(preferred, 1)
+        return batch[0] if batch else None
+
+    def pop_batch(self, preferred: str, size: int) -> List[Dict]:
+        """
+        Up to `size` entries, most urgent first. The first may come from the
+        other lane when `preferred` is empty; the rest only from the lane of
+        the first, so an interactive ticket never waits behind a bulk batch.
+        """
+        self.load()
+        with self._lock:
+            for lane in (preferred,) + tuple(l for l in LANES if l != preferred):
+                entry = self._pop_lane(lane)
+                if entry is not None:
+                    batch = [entry]
+                    while len(batch) < size and lane == BULK:
+                        entry = self._pop_lane(lane)
+                        if entry is None:
+                            break
+                        batch.append(entry)
+                    return batch
+        return []
+
+    def ack(self, ticket_no: str, result=None, error: Optional[BaseException] = None):
+        self.ack_many({ticket_no: result}, error)
+
+    def ack_many(self, results: Dict[str, object], error: Optional[BaseException] = None):
+        """Finish processed tickets: one journal write for the batch, then wake their waiters."""
+        with self._lock:
+            waiters = []
+            for ticket_no in results:
+                entry = self._in_flight.pop(ticket_no, None)
+                if entry is not None:
+                    self._processed[entry["lane"]] += 1
+                waiters.extend((ticket_no, f) for f in self._waiters.pop(ticket_no, []))
+            staged = self._stage([{"op": "ack", "ticket_no": no} for no in results])
+        self._flush(staged)
+        for ticket_no, future in waiters:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[ticket_no])
+
+    # ---- worker wake-ups ----
+    def _notify(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self, lane: str, process: Callable[[List[Dict]], Dict[str, object]], batch_size: int):
+        while True:
+            entries = self.pop_batch(lane, batch_size)
+            if not entries:
+                await self._wait(1.0)
+                continue
+            ticket_nos = [e["ticket_no"] for e in entries]
+            # processing and the journal write both stay off the event loop
+            try:
+                results = await asyncio.to_thread(process, entries)
+            except Exception as e:
+                logging.error(f"[queue] {', '.join(ticket_nos)} failed: {e}")
+                await asyncio.to_thread(self.ack_many, dict.fromkeys(ticket_nos), e)
+            else:
+                await asyncio.to_thread(self.ack_many, {no: results.get(no) for no in ticket_nos})
+
+    def run_workers(self, process: Callable[[List[Dict]], Dict[str, object]], workers: Dict[str, int],
+                    batch_sizes: Optional[Dict[str, int]] = None):
+        """
+        Start `workers[lane]` asyncio workers per lane on the running loop.
+        `process` takes a batch of entries and returns a result per ticket_no.
+        """
+        self.load()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.running = True
+        # anything left in flight by a previous process goes back on the queue
+        with self._lock:
+            for entry in list(self._in_flight.values()):
+                del self._in_flight[entry["ticket_no"]]
+                self._push(entry)
+        return [
+            asyncio.create_task(self._worker(lane, process, (batch_sizes or {}).get(lane, 1)))
+            for lane in LANES
+            for _ in range(workers.get(lane, 0))
+        ]
+
+    # ---- metrics ----
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                queued = [e for e in self._entries.values() if e["lane"] == lane]
+                waits = list(self._waits[lane])
+                lanes[lane] = {
+                    "depth": len(queued),
+                    "in_flight": sum(1 for e in self._in_flight.values() if e["lane"] == lane),
+                    "processed": self._processed[lane],
+                    "oldest_wait_seconds": round(max((now - e["enqueued_at"] for e in queued), default=0.0), 3),
+                    "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "max_recent_wait_seconds": round(max(waits), 3) if waits else 0.0,
+                    "by_severity": {
+                        sev: sum(1 for e in queued if e["severity"] == sev) for sev in SLA_SECONDS
+                    },
+                }
+        return {"running": self.running, "lanes": lanes}
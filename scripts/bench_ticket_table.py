@@ -0,0 +1,77 @@
+"""
+Compare the in-memory cost of tickets as JSON-loaded dicts vs TicketTable.
+
+Builds N synthetic tickets from data/tickets.json, then measures retained
+memory (tracemalloc) and the time of a status+severity filter scan for both,
+and checks the table against a verify=True build.
+
+    python scripts/bench_ticket_table.py --n 1000000
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.ticket_table import TicketTable  # noqa: E402
+
+
+def synthetic_json(n: int) -> str:
+    templates = json.loads((PROJECT_ROOT / "data" / "tickets.json").read_text(encoding="utf-8"))
+    tickets = []
+    for i in range(n):
+        t = json.loads(json.dumps(templates[i % len(templates)]))
+        t["ticket_no"] = f"TICKET-{i + 1:07d}"
+        t["description"] = f"{t.get('description', '')} (#{i})"
+        tickets.append(t)
+    return json.dumps(tickets)
+
+
+def retained(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000)
+    args = parser.parse_args()
+
+    raw = synthetic_json(args.n)
+
+    dicts, dict_bytes = retained(lambda: json.loads(raw))
+    started = time.perf_counter()
+    hits = [t for t in dicts if t.get("status") == "closed"
+            and (t.get("slots") or {}).get("severity", "").lower() == "high"]
+    dict_scan = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table, table_bytes = retained(lambda: TicketTable(dicts))
+    build = time.perf_counter() - started
+    # the full decode check must not find a row the encode-time checks missed
+    assert TicketTable(dicts, verify=True)._overrides.keys() == table._overrides.keys()
+    del dicts
+    started = time.perf_counter()
+    rows = table.filter("closed", "high")
+    table_scan = time.perf_counter() - started
+    assert len(rows) == len(hits)
+
+    print(f"{args.n} tickets, {len(rows)} match status=closed severity=high")
+    print(f"dicts: {dict_bytes / 2**20:8.1f} MiB   scan {dict_scan * 1000:8.1f} ms")
+    print(f"table: {table_bytes / 2**20:8.1f} MiB   scan {table_scan * 1000:8.1f} ms   build {build:.2f}s   {table.stats()}")
+    print(f"memory x{dict_bytes / table_bytes:.1f}, scan x{dict_scan / table_scan:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure cold-start cost of the API.
+
+Runs `import app.main` in a fresh interpreter with `-X importtime`, prints the
+slowest imports and the total wall-clock time, and optionally fails when the
+import takes longer than a budget.
+
+    python scripts/profile_startup.py --top 25 --budget 1.0
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MODULE = "app.main"
+
+
+def run_importtime(module: str):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"importing {module} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return wall, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=MODULE)
+    parser.add_argument("--top", type=int, default=20, help="number of slowest imports to show")
+    parser.add_argument("--budget", type=float, default=None, help="fail if import takes longer (seconds)")
+    args = parser.parse_args()
+
+    wall, rows = run_importtime(args.module)
+    import_us = next((cum for _, cum, name in rows if name.strip() == args.module), None)
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cum_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{cum_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    print()
+    if import_us is not None:
+        print(f"import {args.module}: {import_us / 1e6:.3f}s")
+    print(f"interpreter + import wall time: {wall:.3f}s")
+
+    if args.budget is not None and import_us is not None and import_us / 1e6 > args.budget:
+        raise SystemExit(f"cold start over budget ({import_us / 1e6:.3f}s > {args.budget:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionGate, Rejected
+
+
+def gate(limit=1, max_queue=4, max_wait=5.0):
+    return AdmissionGate("test", limit, limit, limit, max_queue, max_wait)
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_and_timeout():
+    async def run():
+        g = gate(max_queue=1, max_wait=0.01)
+        await g.acquire()
+        waiting = asyncio.create_task(g.acquire())
+        await settle()
+        with pytest.raises(Rejected) as full:
+            await g.acquire()
+        assert full.value.status_code == 429
+        with pytest.raises(Rejected) as timed_out:
+            await waiting
+        assert timed_out.value.status_code == 503
+        assert (g.in_flight, len(g._waiters)) == (1, 0)
+
+    asyncio.run(run())
+
+
+def test_release_admits_in_order():
+    async def run():
+        g = gate()
+        await g.acquire()
+        first, second = asyncio.create_task(g.acquire()), asyncio.create_task(g.acquire())
+        await settle()
+        g.release()
+        await settle()
+        assert first.done() and not second.done()
+        g.release()
+        await settle()
+        assert second.done()
+        g.release()
+        assert (g.in_flight, len(g._waiters)) == (0, 0)
+
+    asyncio.run(run())
+
+
+def test_cancelled_while_queued_leaves_the_queue():
+    async def run():
+        g = gate()
+        await g.acquire()
+        waiting = asyncio.create_task(g.acquire())
+        await settle()
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert (g.in_flight, len(g._waiters)) == (1, 0)
+        g.release()
+        assert g.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_after_grant_passes_the_slot_on():
+    async def run():
+        g = gate()
+        await g.acquire()
+        granted = asyncio.create_task(g.acquire())
+        await settle()
+        following = asyncio.create_task(g.acquire())
+        await settle()
+        g.release()          # hands the slot to `granted` ...
+        granted.cancel()        # ... which is cancelled before it resumes
+        await asyncio.gather(granted, return_exceptions=True)
+        await settle()
+        assert granted.cancelled()
+        assert following.done() and following.exception() is None
+        g.release()
+        assert (g.in_flight, len(g._waiters)) == (0, 0)
+
+    asyncio.run(run())
+
+
+def adaptive(limit=8):
+    return AdmissionGate("test", limit, 2, 16, 4, 5.0, adaptive=True)
+
+
+def feed(g, *latencies, start=0.0, step=1.0):
+    for i, latency in enumerate(latencies):
+        g._adapt(start + i * step, latency)
+
+
+def test_one_fast_call_does_not_collapse_the_limit():
+    g = adaptive()
+    feed(g, 0.005, *[1.0] * 30)
+    assert g.limit == 8
+    # also once warmed up
+    feed(g, 0.005, *[1.0] * 30, start=100.0)
+    assert g.limit == 8
+
+
+def test_baseline_decays_and_saturation_still_shrinks():
+    g = adaptive()
+    feed(g, *[0.2] * 10)
+    feed(g, *[1.0] * 10, start=10.0)
+    assert g.limit < 8
+    # latency stays up: the old low point stops counting and the limit holds
+    g.limit = 8.0
+    feed(g, *[1.0] * 5, start=1000.0, step=120.0)
+    assert g.latency_baseline > 0.9 and g.limit == 8
+
+
+def test_only_observed_calls_adapt():
+    async def run():
+        g = adaptive()
+        await g.acquire()
+        g.release()
+        assert g.latency_ewma is None
+        g.observe(0.5)
+        await g.acquire()
+        g.release()
+        assert g.latency_ewma == 0.5 and not g._samples
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import json
+
+from app.services import export
+from app.services.archive import TicketArchive
+from app.services.export import iter_rows, row_digest, watermark_of
+
+STAMP = "2026-10-19T00:00:00.123456Z"
+
+
+def write(path, tickets):
+    path.write_text(json.dumps(tickets), encoding="utf-8")
+    return path
+
+
+def ticket(no, status="open"):
+    return {"ticket_no": no, "description": "x", "status": status, "metadata": {"createdAt": STAMP, "updatedAt": STAMP}}
+
+
+def test_rows_at_the_watermark_are_sent_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "ticket_archive", TicketArchive(tmp_path / "archive"))
+    tickets = write(tmp_path / "tickets.json", [ticket("T-1"), ticket("T-2")])
+    rows = list(iter_rows("tickets", tickets_path=tickets))
+    since = max(watermark_of("tickets", r) for r in rows)
+
+    # >= keeps rows from the watermark's own millisecond...
+    assert len(list(iter_rows("tickets", since, tickets_path=tickets))) == 2
+    # ...unless they were already exported unchanged
+    seen = {row_digest(r) for r in rows}
+    assert list(iter_rows("tickets", since, seen, tickets_path=tickets)) == []
+
+    # changed again within the same millisecond: sent again
+    write(tickets, [ticket("T-1"), ticket("T-2", status="closed")])
+    assert [r["ticket_no"] for r in iter_rows("tickets", since, seen, tickets_path=tickets)] == ["T-2"]
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm
+from app.services.llm import JsonScanner, complete_json, parse_json
+from app.services.slot_extractor import SLOTS_SCHEMA
+
+SLOTS = ('{"issue_type": "bug", "severity": "high", "affected_system": "crm", '
+         '"confidence_scores": {"issue_type": 0.9, "severity": 0.8, "affected_system": 0.7}}')
+
+
+# -----------------------------
+# parse_json / JsonScanner
+# -----------------------------
+@pytest.mark.parametrize("text", [
+    SLOTS,
+    f"```json\n{SLOTS}\n```",
+    f"Sure! Here is the result:\n{SLOTS}\nLet me know if you need anything else.",
+    f"[note] {SLOTS}",
+])
+def test_skips_prose_and_fences(text):
+    assert parse_json(text)["confidence_scores"]["affected_system"] == 0.7
+
+
+def test_drops_trailing_commas():
+    assert parse_json('{"a": [1, 2, ], "b": {"c": 3,},\n}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_brackets_and_quotes_inside_strings():
+    text = r'{"comment": "restart {svc} [now], then say \"done\"", "n": 1}'
+    assert parse_json(text) == {"comment": 'restart {svc} [now], then say "done"', "n": 1}
+
+
+@pytest.mark.parametrize("cut, expected", [
+    ('{"a": 1, "b": "hal', {"a": 1, "b": "hal"}),
+    ('{"a": 1, "b": ', {"a": 1}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": {"x": [1, 2', {"a": {"x": [1, 2]}}),
+    ('{"a": tr', {}),
+])
+def test_truncated_keeps_the_complete_part(cut, expected):
+    assert parse_json(cut) == expected
+
+
+def test_scanner_in_chunks():
+    scanner = JsonScanner()
+    chunks = ["Result: ", '{"issue_type": "bu', 'g", "sev', 'erity": "low"}', " trailing text"]
+    done = [scanner.feed(chunk) for chunk in chunks]
+    assert done == [False, False, False, True, True]
+    assert scanner.value() == {"issue_type": "bug", "severity": "low"}
+
+
+def test_no_json():
+    with pytest.raises(ValueError):
+        parse_json("I could not classify this ticket.")
+
+
+# -----------------------------
+# complete_json
+# -----------------------------
+def reply(arguments=None, content=None, finish_reason="stop"):
+    tool_calls = [SimpleNamespace(function=SimpleNamespace(arguments=arguments))] if arguments is not None else None
+    message = SimpleNamespace(tool_calls=tool_calls, content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)])
+
+
+@pytest.fixture
+def answer(monkeypatch):
+    calls = []
+
+    def set_reply(resp):
+        monkeypatch.setattr(llm, "create_completion", lambda messages, api_version=None, **params: calls.append(params) or resp)
+        return calls
+    return set_reply
+
+
+def test_complete_json_reads_the_tool_call(answer):
+    calls = answer(reply(arguments=SLOTS))
+    assert complete_json([], "record_slots", SLOTS_SCHEMA)["severity"] == "high"
+    assert calls[0]["tool_choice"] == {"type": "function", "function": {"name": "record_slots"}}
+
+
+def test_complete_json_falls_back_to_content(answer):
+    answer(reply(content=f"```json\n{SLOTS}\n```"))
+    assert complete_json([], "record_slots", SLOTS_SCHEMA)["issue_type"] == "bug"
+
+
+def test_complete_json_rejects_truncated_output(answer):
+    # parse_json alone would happily return the first three fields
+    answer(reply(arguments=SLOTS[:SLOTS.index('"confidence_scores"') + 30], finish_reason="length"))
+    with pytest.raises(ValueError, match="truncated"):
+        complete_json([], "record_slots", SLOTS_SCHEMA)
+
+
+def test_complete_json_checks_nested_required(answer):
+    answer(reply(arguments='{"issue_type": "bug", "severity": "high", "affected_system": "crm", '
+                           '"confidence_scores": {"issue_type": 0.9}}'))
+    with pytest.raises(ValueError, match="confidence_scores.severity, confidence_scores.affected_system"):
+        complete_json([], "record_slots", SLOTS_SCHEMA)
+
+    answer(reply(arguments='{"issue_type": "bug", "severity": "high", "affected_system": "crm", '
+                           '"confidence_scores": 0.9}'))
+    with pytest.raises(ValueError, match="not an object"):
+        complete_json([], "record_slots", SLOTS_SCHEMA)
@@ -0,0 +1,94 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm
+
+MESSAGES = [{"role": "user", "content": "classify: CRM is down"}]
+
+
+class Upstream:
+    """Fake client whose create() blocks until `go` is set and counts calls."""
+
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.go = threading.Event()
+        self.result, self.error = result, error
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **params):
+        with self._lock:
+            self.calls += 1
+        self.go.wait(5)
+        if self.error:
+            raise self.error
+        return self.result or object()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    def install(**kwargs):
+        fake = Upstream(**kwargs)
+        monkeypatch.setattr(llm, "get_client", lambda api_version=None: fake)
+        return fake
+    return install
+
+
+def call_concurrently(n, **params):
+    results = [None] * n
+
+    def call(i):
+        try:
+            results[i] = llm.create_completion(MESSAGES, **params)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)  # let every caller reach the upstream or the in-flight future
+    return threads, results
+
+
+def finish(fake, threads):
+    fake.go.set()
+    for t in threads:
+        t.join(5)
+
+
+def test_identical_calls_share_one_upstream_call(upstream):
+    fake = upstream()
+    threads, results = call_concurrently(5, temperature=0)
+    assert fake.calls == 1
+    finish(fake, threads)
+    assert all(r is results[0] for r in results) and results[0] is not None
+    assert not llm._inflight
+
+
+def test_leader_exception_reaches_every_follower(upstream):
+    fake = upstream(error=TimeoutError("upstream timed out"))
+    threads, results = call_concurrently(4, temperature=0)
+    finish(fake, threads)
+    assert fake.calls == 1
+    assert all(isinstance(r, TimeoutError) for r in results)
+    assert not llm._inflight
+
+
+def test_sampled_calls_are_not_merged(upstream):
+    fake = upstream()
+    threads, results = call_concurrently(3, temperature=0.7)
+    assert fake.calls == 3
+    finish(fake, threads)
+    assert len({id(r) for r in results}) == 3
+
+
+def test_coalescing_can_be_switched_off(upstream, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_COALESCE", False)
+    fake = upstream()
+    threads, _ = call_concurrently(3, temperature=0)
+    assert fake.calls == 3
+    finish(fake, threads)
+    assert not llm._inflight
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.replay import BUCKETS, FIELDS, aggregate_buckets, bucket_counts, sweep, weight_grid
+from app.services.slot_extractor import calculate_aggregate
+
+
+def history(n=20000, seed=7):
+    rng = np.random.default_rng(seed)
+    # two-decimal scores, like the LLM and fallback extractors produce
+    scores = np.round(rng.integers(40, 101, size=(n, 3)) / 100, 2)
+    reviewed = rng.random(n) < 0.3
+    return {"scores": scores, "reviewed": reviewed, "overridden": reviewed & (rng.random(n) < 0.2)}
+
+
+def live_bucket(row, w):
+    aggregate = calculate_aggregate(dict(zip(FIELDS, row.tolist())), dict(zip(FIELDS, w.tolist())))
+    return round(aggregate * 100)
+
+
+def test_buckets_match_calculate_aggregate():
+    scores = history(3000)["scores"]
+    weights = weight_grid(0.05)
+    buckets = aggregate_buckets(scores, weights)
+    expected = np.array([[live_bucket(row, w) for w in weights] for row in scores])
+    assert (buckets == expected).all()
+
+
+def test_sweep_matches_live_auto_close():
+    h = history()
+    weights = np.array([[0.4, 0.3, 0.3], [0.5, 0.25, 0.25], [0.35, 0.35, 0.3]])
+    result = sweep(h, weights, [0.85])
+    for i, w in enumerate(weights):
+        live = sum(
+            calculate_aggregate(dict(zip(FIELDS, row.tolist())), dict(zip(FIELDS, w.tolist()))) >= 0.85
+            for row in h["scores"]
+        )
+        assert result["auto_closed"][i, 0] == live
+
+
+def test_bucket_counts_cover_every_ticket():
+    h = history(500)
+    counts = bucket_counts(h, weight_grid(0.1))
+    assert counts["total"].shape[1] == BUCKETS
+    assert (counts["total"].sum(axis=1) == 500).all()
+    assert (counts["reviewed"].sum(axis=1) == h["reviewed"].sum()).all()
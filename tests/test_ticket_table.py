@@ -0,0 +1,102 @@
+import json
+
+from app.services import archive, ticket_table
+from app.services.archive import TicketArchive
+from app.services.ticket_engine import save_json, update_tickets
+from app.services.ticket_table import TicketTable
+
+
+def ticket(no, status="open", severity="high", **extra):
+    t = {
+        "ticket_no": no,
+        "description": f"CRM is down ({no})",
+        "status": status,
+        "slots": {
+            "issue_type": "incident",
+            "severity": severity,
+            "affected_system": "crm",
+            "confidence_scores": {"issue_type": 0.9, "severity": 0.95, "affected_system": 0.9},
+            "aggregate_confidence": 0.91,
+        },
+        "proposedFix": "Restart the CRM service.",
+        "metadata": {"createdAt": "2026-01-01T00:00:00Z", "updatedAt": "2026-01-02T03:04:05.123456Z",
+                     "createdBy": "import"},
+    }
+    t.update(extra)
+    return t
+
+
+ODD = [
+    {"ticket_no": "BARE"},
+    ticket("EXTRA-KEY", review_summary="ok", custom={"a": [1, 2]}),
+    ticket("NONE-STATUS", status=None),
+    ticket("NUMERIC-STATUS", status=3),
+    ticket("PRECISE", slots={"severity": "low", "confidence_scores": {"severity": 0.123456789}}),
+    ticket("INT-CONF", slots={"confidence_scores": {"issue_type": 1, "severity": 0}, "aggregate_confidence": 1}),
+    ticket("BOOL-CONF", slots={"confidence_scores": {"issue_type": True}}),
+    ticket("EMPTY-SCORES", slots={"issue_type": "bug", "confidence_scores": {}}),
+    ticket("NULL-SCORE", slots={"confidence_scores": {"severity": None}}),
+    ticket("EXTRA-SLOT", slots={"issue_type": "bug", "reason": "keyword"}),
+    ticket("SLOT-LIST", slots=["bug"]),
+    ticket("EMPTY-SLOTS", slots={}),
+    ticket("NULL-SLOTS", slots=None),
+    ticket("MILLIS", metadata={"createdAt": "2026-01-01T00:00:00.000Z"}),
+    ticket("OFFSET", metadata={"createdAt": "2026-01-01T00:00:00+02:00Z"}),
+    ticket("NO-Z", metadata={"createdAt": "2026-01-01T00:00:00"}),
+    ticket("ARCHIVED", metadata={"createdAt": "2026-01-01T00:00:00Z", "archivedAt": "2026-02-01T00:00:00Z"}),
+    ticket("META-STR", metadata="n/a"),
+    ticket("UNICODE", description="Störung im ERP — 🔥"),
+]
+
+
+def test_round_trip():
+    tickets = [ticket(f"T-{i}") for i in range(5)] + ODD
+    table = TicketTable(json.loads(json.dumps(tickets)))
+    assert table.rows(range(len(table))) == tickets
+    assert table.stats()["overrides"] < len(ODD)
+
+
+def test_encode_checks_match_full_decode():
+    tickets = [ticket(f"T-{i}") for i in range(5)] + ODD
+    fast = TicketTable(tickets)
+    verified = TicketTable(tickets, verify=True)
+    # verify=True decodes every row; it must not find a row _encode let through
+    assert verified._overrides.keys() == fast._overrides.keys()
+    assert not fast._overrides.keys() & set(range(5))
+
+
+def test_filter_and_find():
+    table = TicketTable([ticket("A", severity="High"), ticket("B", status="closed"), ticket("C", severity="low")])
+    assert table.filter(severity="high").tolist() == [0, 1]
+    assert table.filter(status="closed", severity="HIGH").tolist() == [1]
+    assert table.find("C") == 2
+    assert table.find("D") is None
+
+
+def test_hot_table_rebuilds_only_on_ticket_writes(tmp_path, monkeypatch):
+    tickets_path, memory_path = tmp_path / "tickets.json", tmp_path / "memory.json"
+    monkeypatch.setattr(ticket_table, "TICKETS_PATH", tickets_path)
+    monkeypatch.setitem(ticket_table._hot, "version", None)
+    save_json(tickets_path, [ticket("A")])
+
+    table = ticket_table.hot_table()
+    save_json(memory_path, [{"ticketId": "A", "action": "APPROVE"}])
+    assert ticket_table.hot_table() is table
+
+    save_json(tickets_path, [ticket("A"), ticket("B")])
+    assert len(ticket_table.hot_table()) == 2
+
+
+def test_one_off_lookups_do_not_rebuild(tmp_path, monkeypatch):
+    tickets_path = tmp_path / "tickets.json"
+    monkeypatch.setattr(ticket_table, "TICKETS_PATH", tickets_path)
+    monkeypatch.setattr(archive, "TICKETS_PATH", tickets_path)
+    monkeypatch.setattr(archive, "ticket_archive", TicketArchive(tmp_path / "archive"))
+    monkeypatch.setitem(ticket_table._hot, "version", None)
+    save_json(tickets_path, [ticket("A")])
+    table = ticket_table.hot_table()
+
+    update_tickets(tickets_path, lambda data: data.append(ticket("B")) or True)
+    assert archive.ticket_exists("B") and not archive.ticket_exists("C")
+    assert archive.find_ticket("B")["ticket_no"] == "B"
+    assert ticket_table._hot["table"] is table and ticket_table.current_hot_table() is None
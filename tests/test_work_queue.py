@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+
+from app.config import SLA_SECONDS
+from app.services.work_queue import TicketQueue, INTERACTIVE, BULK
+
+
+def ticket(no, description="printer is slow", created="2026-01-01T00:00:00Z", created_by="import"):
+    return {
+        "ticket_no": no,
+        "description": description,
+        "status": "open",
+        "metadata": {"createdAt": created, "createdBy": created_by},
+    }
+
+
+def drain(queue, lane=BULK):
+    order = []
+    while True:
+        entry = queue.pop(lane)
+        if entry is None:
+            return order
+        order.append(entry["ticket_no"])
+
+
+def test_earliest_deadline_first(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    queue.enqueue_many([
+        ticket("LOW", "printer is slow"),
+        ticket("CRITICAL", "critical: production database is down"),
+        # old enough that its low-severity deadline is the earliest of all
+        ticket("OLD-LOW", "printer is slow", created="2025-12-01T00:00:00Z"),
+    ])
+    assert drain(queue) == ["OLD-LOW", "CRITICAL", "LOW"]
+
+
+def test_lanes_and_stealing(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    queue.enqueue_many([ticket("BULK-1"), ticket("CHAT-1", created_by="chat-user")])
+    assert queue.pop(INTERACTIVE)["ticket_no"] == "CHAT-1"
+    # an idle interactive worker takes from the bulk lane
+    assert queue.pop(INTERACTIVE)["ticket_no"] == "BULK-1"
+    assert queue.pop(BULK) is None
+
+
+def test_duplicates_are_ignored(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    assert queue.enqueue_many([ticket("T-1")]) == 1
+    assert queue.enqueue_many([ticket("T-1")]) == 0
+    entry = queue.pop(BULK)
+    # in flight: not queued again until acked
+    assert queue.enqueue_many([ticket("T-1")]) == 0
+    queue.ack(entry["ticket_no"])
+    assert queue.enqueue_many([ticket("T-1")]) == 1
+
+
+def test_submit_promotes_bulk_entry(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    queue.enqueue_many([ticket("T-1"), ticket("T-2")])
+    future = queue.submit(ticket("T-2"), INTERACTIVE)
+
+    entry = queue.pop(INTERACTIVE)
+    assert (entry["ticket_no"], entry["lane"]) == ("T-2", INTERACTIVE)
+    # the stale bulk heap slot of T-2 is skipped
+    assert drain(queue) == ["T-1"]
+
+    queue.ack("T-2", {"status": "closed"})
+    assert future.result(timeout=1) == {"status": "closed"}
+
+
+def test_ack_resolves_errors(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    future = queue.submit(ticket("T-1"), INTERACTIVE)
+    queue.pop(INTERACTIVE)
+    queue.ack("T-1", error=RuntimeError("boom"))
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+
+
+def test_bulk_batches_stay_in_their_lane(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    queue.enqueue_many([ticket(f"B-{i}") for i in range(5)])
+    queue.submit(ticket("CHAT-1"), INTERACTIVE)
+
+    assert [e["ticket_no"] for e in queue.pop_batch(INTERACTIVE, 3)] == ["CHAT-1"]
+    assert len(queue.pop_batch(BULK, 3)) == 3
+    # stolen work never pulls a whole bulk batch into the interactive lane
+    assert [e["lane"] for e in queue.pop_batch(INTERACTIVE, 1)] == [BULK]
+
+
+def test_restart_restores_unacked_entries(tmp_path):
+    path = tmp_path / "queue.json"
+    queue = TicketQueue(path)
+    queue.enqueue_many([ticket("T-1"), ticket("T-2"), ticket("T-3")])
+    queue.submit(ticket("T-3"), INTERACTIVE)
+    done = queue.pop(BULK)
+    queue.ack(done["ticket_no"])
+    in_flight = queue.pop(BULK)  # never acked: the process "dies" here
+
+    restarted = TicketQueue(path)
+    restarted.load()
+    remaining = {e["ticket_no"]: e for e in restarted._entries.values()}
+    assert set(remaining) == {"T-1", "T-2", "T-3"} - {done["ticket_no"]}
+    assert in_flight["ticket_no"] in remaining
+    assert remaining["T-3"]["lane"] == INTERACTIVE
+    assert remaining["T-3"]["description"] == "printer is slow"
+
+
+def test_legacy_array_file_loads(tmp_path):
+    path = tmp_path / "queue.json"
+    path.write_text(json.dumps([{
+        "ticket_no": "T-1", "lane": BULK, "severity": "low", "created_at": 0.0,
+        "deadline": float(SLA_SECONDS["low"]), "enqueued_at": 0.0,
+    }]), encoding="utf-8")
+    queue = TicketQueue(path)
+    assert drain(queue) == ["T-1"]
+
+
+def test_journal_is_compacted(tmp_path):
+    path = tmp_path / "queue.json"
+    queue = TicketQueue(path)
+    for i in range(TicketQueue.COMPACT_MIN_RECORDS):
+        queue.enqueue_many([ticket(f"T-{i}")])
+        queue.ack(queue.pop(BULK)["ticket_no"])
+    queue.enqueue_many([ticket("LAST")])
+
+    assert len(path.read_text(encoding="utf-8").splitlines()) < TicketQueue.COMPACT_MIN_RECORDS
+    restarted = TicketQueue(path)
+    assert drain(restarted) == ["LAST"]
+
+
+def test_pop_does_not_wait_for_journal_writes(tmp_path):
+    queue = TicketQueue(tmp_path / "queue.json")
+    queue.enqueue_many([ticket("T-1")])
+    writers = []
+    with queue._write_turn:  # the disk is "busy": no journal write can finish
+        for no in ("T-2", "T-3"):
+            writers.append(threading.Thread(target=queue.enqueue_many, args=([ticket(no)],)))
+            writers[-1].start()
+        time.sleep(0.05)
+        popped = []
+        reader = threading.Thread(target=lambda: popped.extend(drain(queue)))
+        reader.start()
+        reader.join(1.0)
+        assert not reader.is_alive()
+        assert sorted(popped) == ["T-1", "T-2", "T-3"]
+    for w in writers:
+        w.join()
+    queue.ack_many(dict.fromkeys(["T-1", "T-2"]))
+
+    restarted = TicketQueue(tmp_path / "queue.json")
+    restarted.load()
+    assert drain(restarted) == ["T-3"]